@@ -437,6 +437,25 @@ def parse_args():
     driver_other.add_argument(
         "--portfolio-eliminate-actions", action="store_true",
         help="run action elimination after each new found plan in portfolio")
+    driver_other.add_argument(
+        "--action-elimination-in-process", action="store_true",
+        help="create the action elimination task in the driver process and "
+             "pass it to the search without writing it to disk. The input "
+             "task is parsed only once for all plans. The time and memory "
+             "limits only apply to the search")
+    driver_other.add_argument(
+        "--action-elimination-anytime", action="store_true",
+        help="write the plan reduced by greedy action elimination at once "
+             "and replace it with each better plan the search finds, so "
+             "that the best plan so far is on disk when the overall time "
+             "limit is reached. Use an anytime configuration (e.g. an "
+             "iterated search) with --action-elimination-planner-config")
+    driver_other.add_argument(
+        "--action-elimination-workspace", metavar="DIR", default=None,
+        help="directory where action elimination stores its files (compiled "
+             "task, plan with skip actions and original costs). By default, "
+             "a new temporary directory is used for each run and removed "
+             "at the end")
 
     driver_other.add_argument(
         "--cleanup", action="store_true",
@@ -500,6 +519,16 @@ def parse_args():
     if args.portfolio_eliminate_actions and not args.portfolio:
         print_usage_and_exit_with_driver_input_error(
             parser, "--portfolio-eliminate-actions may only be used for portfolios.")
+    if args.action_elimination_in_process and not (args.eliminate_actions or args.portfolio_eliminate_actions):
+        print_usage_and_exit_with_driver_input_error(
+            parser, "--action-elimination-in-process requires --eliminate-actions or --portfolio-eliminate-actions.")
+    if args.action_elimination_anytime and not (args.eliminate_actions or args.portfolio_eliminate_actions):
+        print_usage_and_exit_with_driver_input_error(
+            parser, "--action-elimination-anytime requires --eliminate-actions or --portfolio-eliminate-actions.")
+    if "--gzip" in args.action_elimination_options:
+        # The driver passes the task it names to the search, not the compressed one
+        print_usage_and_exit_with_driver_input_error(
+            parser, "--gzip is not supported in --action-elimination-options.")
 
     if not args.version and not args.show_aliases and not args.cleanup:
         _set_components_and_inputs(parser, args)
@@ -46,7 +46,12 @@ def _get_preexec_function(time_limit, memory_limit):
         return set_limits
 
 
-def check_call(nick, cmd, stdin=None, time_limit=None, memory_limit=None):
+def check_call(nick, cmd, stdin=None, time_limit=None, memory_limit=None, stdin_writer=None):
+    """Run cmd and raise CalledProcessError if it fails. Its input is
+    read from the file stdin or, if stdin_writer is given, written by
+    calling stdin_writer with a text stream connected to the input of
+    the process, so that no input file is needed."""
+    assert stdin is None or stdin_writer is None
     print_call_settings(nick, cmd, stdin, time_limit, memory_limit)
 
     kwargs = {"preexec_fn": _get_preexec_function(time_limit, memory_limit)}
@@ -55,6 +60,22 @@ def check_call(nick, cmd, stdin=None, time_limit=None, memory_limit=None):
     if stdin:
         with open(stdin) as stdin_file:
             return subprocess.check_call(cmd, stdin=stdin_file, **kwargs)
+    elif stdin_writer:
+        logging.info("{} input is written by the driver".format(nick))
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, universal_newlines=True, **kwargs)
+        try:
+            stdin_writer(process.stdin)
+        except BrokenPipeError:
+            # The process stopped reading its input, its exit code tells why.
+            pass
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = process.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return returncode
     else:
         return subprocess.check_call(cmd, **kwargs)
 
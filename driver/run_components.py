@@ -1,4 +1,6 @@
+import atexit
 import errno
+import importlib
 import json
 import logging
 import os.path
@@ -7,7 +9,10 @@ import signal
 import subprocess
 import sys
 import re
+import tempfile
+import threading
 import time
+import traceback
 
 from . import call
 from . import limits
@@ -207,6 +212,57 @@ def run_validate(args):
     else:
         return (0, True)
 
+# Files of action elimination, stored in the action elimination workspace.
+AE_TASK_FILE = "action-elimination.sas"
+AE_PLAN_FILE = "plan_with_skip_actions"
+AE_COSTS_FILE = "original-op-costs.txt"
+AE_GREEDY_PLAN_FILE = "greedy_plan"
+# Seconds between checks for new plans of the search in anytime mode.
+AE_ANYTIME_POLL_INTERVAL = 1
+
+
+def get_action_elimination_workspace(args):
+    """Return the directory where action elimination stores its files.
+    Unless a directory was given with --action-elimination-workspace,
+    a new temporary directory is created for this run of the driver
+    and removed when the driver exits, so that several runs can
+    eliminate actions in the same working directory."""
+    if args.action_elimination_workspace is None:
+        args.action_elimination_workspace = tempfile.mkdtemp(prefix="action-elimination-")
+        atexit.register(shutil.rmtree, args.action_elimination_workspace, ignore_errors=True)
+    else:
+        os.makedirs(args.action_elimination_workspace, exist_ok=True)
+    return args.action_elimination_workspace
+
+
+# Tasks parsed by the in-process action elimination, indexed by the path, modification time and size of
+# their file, so that a task is parsed only once for all its plans.
+_action_elimination_tasks = {}
+
+
+def create_action_elimination_task_in_process(args, ae_options):
+    """Create the action elimination task in the driver process with the
+    action elimination module of the build. ae_options are the command
+    line options of action_elim.py, including the task and plan files.
+    The task is not written to disk and the parsed input task is reused
+    by later calls."""
+    action_elimination = get_executable(args.build, REL_ACTION_ELIMINATION_PATH)
+    translate_dir = os.path.dirname(action_elimination)
+    if translate_dir not in sys.path:
+        sys.path.insert(0, translate_dir)
+    action_elim = importlib.import_module("action_elim")
+
+    options = action_elim.parse_args(ae_options)
+    stat = os.stat(options.task)
+    key = (os.path.abspath(options.task), stat.st_mtime_ns, stat.st_size)
+    if key not in _action_elimination_tasks:
+        _action_elimination_tasks.clear()
+        _action_elimination_tasks[key] = action_elim.parse_task(options.task, use_cache=False)
+    task, operator_name_to_index = _action_elimination_tasks[key]
+    plan, _ = action_elim.parse_plan(options.plan)
+    return action_elim.eliminate_actions(task, operator_name_to_index, plan, options)
+
+
 def run_eliminate_actions(args):
     def parse_plan_filter_skip_actions(planfile):
         MACRO_OP_STRING = "-triv-nec-macro-"
@@ -223,9 +279,8 @@ def run_eliminate_actions(args):
         total_cost = int(re.match(r"; cost = (\d+) \(.+ cost\)", lines[-1]).group(1))
         return plan, total_cost
 
-    def parse_original_action_costs():
-        ORGINAL_OP_COSTS_FILE = 'original-op-costs.txt'
-        with open(ORGINAL_OP_COSTS_FILE, 'r') as op_cost_file:
+    def parse_original_action_costs(costs_file):
+        with open(costs_file, 'r') as op_cost_file:
             cost_scaling_info = json.loads(op_cost_file.read())
         return cost_scaling_info["num_zero_cost_operators"], cost_scaling_info["original_costs"]
 
@@ -247,7 +302,8 @@ def run_eliminate_actions(args):
     old_plan_cost = plan_manager.get_next_portfolio_cost_bound()
 
     # Store plan file in not definitive file before filtering actions
-    unfiltered_plan_file = "plan_with_skip_actions"
+    workspace = get_action_elimination_workspace(args)
+    unfiltered_plan_file = os.path.join(workspace, AE_PLAN_FILE)
     ae_plan_file = plan_manager._get_plan_file(len(plan_files) + 1)
 
     time_limit = limits.get_time_limit(None, args.overall_time_limit)
@@ -256,64 +312,202 @@ def run_eliminate_actions(args):
     ae_options = args.action_elimination_options
     planner_options = ["--internal-plan-file", unfiltered_plan_file] + args.action_elimination_planner_configuration
 
-    # Action elimination produced task file is always this one
-    ae_task_file = "action-elimination.sas"
-
-    assert sys.executable, "Path to interpreter could not be found"
-    action_elimination = get_executable(args.build, REL_ACTION_ELIMINATION_PATH)
+    # All files written by action elimination are stored in the workspace
+    ae_task_file = os.path.join(workspace, AE_TASK_FILE)
+    ae_costs_file = os.path.join(workspace, AE_COSTS_FILE)
+    greedy_plan_file = os.path.join(workspace, AE_GREEDY_PLAN_FILE)
     last_plan_file = plan_manager._get_plan_file(plan_manager.get_plan_counter())
-    cmd = [sys.executable, action_elimination] + ae_options + ["-t", args.sas_file, "-p", last_plan_file]
-    logging.info("Creating action elimination task.")
-    try:
-        call.check_call(
-            "action-elimination",
-            cmd,
-            time_limit=time_limit,
-            memory_limit=memory_limit)
-    except subprocess.CalledProcessError as err:
-        returncodes.print_stderr(
-                f"Error while eliminating actions. Exit status {err.returncode}")
-        return err.returncode, False
+    ae_files_options = ["-t", args.sas_file, "-p", last_plan_file, "-d", workspace, "-f", AE_TASK_FILE,
+                        "--costs-file", ae_costs_file]
+    if args.action_elimination_anytime:
+        # The plan reduced by greedy action elimination is the first improvement
+        ae_files_options += ["--greedy-plan-file", greedy_plan_file]
+        # The search writes its n-th plan to <unfiltered_plan_file>.<n>
+        planner_options += ["--internal-previous-portfolio-plans", "0"]
+
+    best_plan_cost = old_plan_cost
+    logging.info("Old plan cost: %d" % old_plan_cost)
+
+    def clean_plan(planfile, scaled_costs):
+        # Remove skip actions if present in plan
+        cleaned_plan, plan_cost = parse_plan_filter_skip_actions(planfile)
+
+        # If cost scaling was done, we need to map back action costs
+        if scaled_costs and 'MR' in ae_options and '--no-cost-scaling' not in ae_options:
+            num_zero_cost_ops, original_op_costs_map = parse_original_action_costs(ae_costs_file)
+            if num_zero_cost_ops != 0:
+                plan_cost = sum([original_op_costs_map[op] for op in cleaned_plan])
+        return cleaned_plan, plan_cost
+
+    def write_plan_if_better(cleaned_plan, plan_cost):
+        nonlocal best_plan_cost
+        logging.info("New plan cost: %d" % plan_cost)
+        if plan_cost >= best_plan_cost:
+            return
+        best_plan_cost = plan_cost
+        cleaned_plan = cleaned_plan + ["; cost = %d (%s)" % (plan_cost, "general cost" \
+                                       if plan_manager.get_problem_type() == "general cost" else "unit cost")]
+
+        # Write cleaned plan to file. The file is replaced at once, so that a
+        # complete plan is on disk even if the planner is killed meanwhile.
+        tmp_plan_file = ae_plan_file + ".tmp"
+        with open(tmp_plan_file, 'w') as found_plan:
+            found_plan.write("\n".join(cleaned_plan))
+            found_plan.write("\n")
+        os.replace(tmp_plan_file, ae_plan_file)
+
+    def is_complete_plan_file(planfile):
+        # A plan file is complete once its cost line is written
+        try:
+            with open(planfile) as stream:
+                last_line = stream.readlines()[-1:]
+        except FileNotFoundError:
+            return False
+        return bool(last_line) and last_line[0].startswith("; cost = ") and last_line[0].endswith("\n")
+
+    num_anytime_plans = 0
+    # Plans are processed by the main thread and by the thread watching for new plans
+    anytime_plans_lock = threading.Lock()
+
+    def process_anytime_plans():
+        nonlocal num_anytime_plans
+        with anytime_plans_lock:
+            if is_complete_plan_file(greedy_plan_file):
+                logging.info("Greedy action elimination plan found.")
+                write_plan_if_better(*clean_plan(greedy_plan_file, scaled_costs=False))
+                os.remove(greedy_plan_file)
+            while True:
+                planfile = "%s.%d" % (unfiltered_plan_file, num_anytime_plans + 1)
+                if not is_complete_plan_file(planfile):
+                    return
+                logging.info("Action elimination plan %d found." % (num_anytime_plans + 1))
+                write_plan_if_better(*clean_plan(planfile, scaled_costs=True))
+                os.remove(planfile)
+                num_anytime_plans += 1
+
+    def found_better_plan():
+        # Any plan of the anytime mode, including the greedy plan, may have improved the plan
+        return best_plan_cost < old_plan_cost
+
+    if args.action_elimination_anytime:
+        # Plans left in the workspace by an earlier run that was killed are not plans of this run
+        for filename in os.listdir(workspace):
+            if filename == AE_GREEDY_PLAN_FILE or re.fullmatch(re.escape(AE_PLAN_FILE) + r"\.\d+", filename):
+                os.remove(os.path.join(workspace, filename))
+
+        # Plans are processed as soon as they are written: the greedy plan while the
+        # task is created and the plans of the search while the search runs
+        stop_watching = threading.Event()
+
+        def watch_anytime_plans():
+            while not stop_watching.wait(AE_ANYTIME_POLL_INTERVAL):
+                process_anytime_plans()
+
+        watcher = threading.Thread(target=watch_anytime_plans, daemon=True)
+        watcher.start()
+
+    def stop_watching_anytime_plans():
+        stop_watching.set()
+        watcher.join()
+        process_anytime_plans()
+
+    ae_returncode = None
+    if args.action_elimination_in_process:
+        logging.info("Creating action elimination task in process.")
+        # The task is created without the limits of a subprocess, so the time
+        # left is checked before and after creating it
+        if limits.get_time_limit(None, args.overall_time_limit) == 0:
+            ae_returncode = returncodes.TRANSLATE_OUT_OF_TIME
+            returncodes.print_stderr("No time left for creating the action elimination task.")
+        else:
+            try:
+                ae_task = create_action_elimination_task_in_process(args, ae_options + ae_files_options)
+            except SystemExit as err:
+                # The action elimination module exits on errors, e.g. if the task is trivially solvable
+                ae_returncode = err.code if isinstance(err.code, int) else 1
+                returncodes.print_stderr(
+                    f"Error while eliminating actions: {err.code}")
+            except MemoryError:
+                ae_returncode = returncodes.TRANSLATE_OUT_OF_MEMORY
+                returncodes.print_stderr("Out of memory while eliminating actions.")
+            except Exception:
+                # E.g. a plan action that is not in the task, or an invalid task file
+                ae_returncode = returncodes.TRANSLATE_CRITICAL_ERROR
+                traceback.print_exc()
+                returncodes.print_stderr(
+                    f"Error while eliminating actions. Exit status {ae_returncode}")
+            else:
+                if limits.get_time_limit(None, args.overall_time_limit) == 0:
+                    ae_returncode = returncodes.TRANSLATE_OUT_OF_TIME
+                    returncodes.print_stderr("Out of time while creating the action elimination task.")
+                else:
+                    # The task is written directly to the input of the search
+                    ae_search_input = {"stdin_writer": ae_task.output}
+    else:
+        assert sys.executable, "Path to interpreter could not be found"
+        action_elimination = get_executable(args.build, REL_ACTION_ELIMINATION_PATH)
+        cmd = [sys.executable, action_elimination] + ae_options + ae_files_options
+        logging.info("Creating action elimination task.")
+        try:
+            call.check_call(
+                "action-elimination",
+                cmd,
+                time_limit=time_limit,
+                memory_limit=memory_limit)
+        except subprocess.CalledProcessError as err:
+            ae_returncode = err.returncode
+            returncodes.print_stderr(
+                    f"Error while eliminating actions. Exit status {err.returncode}")
+        else:
+            ae_search_input = {"stdin": ae_task_file}
+
+    if ae_returncode is not None:
+        if args.action_elimination_anytime:
+            stop_watching_anytime_plans()
+            if found_better_plan():
+                return 0, True
+        return ae_returncode, False
+    if args.action_elimination_anytime:
+        # The greedy plan is written before the search starts
+        process_anytime_plans()
 
     executable = get_executable(args.build, REL_SEARCH_PATH)
     logging.info("Running search for action elimination task.")
 
+    # The search gets the time that creating the task left
+    time_limit = limits.get_time_limit(None, args.overall_time_limit)
     try:
         ae_planner_call_time = time.time()
         call.check_call(
                 "search",
                 [executable] + planner_options,
-                stdin=ae_task_file,
                 time_limit=time_limit,
-                memory_limit=memory_limit)
+                memory_limit=memory_limit,
+                **ae_search_input)
         ae_planner_call_time = time.time() - ae_planner_call_time
         logging.info(f"AE planner call time: {ae_planner_call_time:3f}")
     except subprocess.CalledProcessError as err:
             assert err.returncode >= 10 or err.returncode < 0, "got returncode < 10: {}".format(err.returncode)
+            if not args.action_elimination_anytime:
+                returncodes.print_stderr(
+                    f"Error while running search for eliminating actions. Exit status {err.returncode}")
+                return (err.returncode, False)
+            search_returncode = err.returncode
+    else:
+        search_returncode = 0
+    finally:
+        if args.action_elimination_anytime:
+            stop_watching_anytime_plans()
+
+    if args.action_elimination_anytime:
+        # Anytime searches usually stop because of the time limit
+        if search_returncode and not num_anytime_plans and not found_better_plan():
             returncodes.print_stderr(
-                f"Error while running search for eliminating actions. Exit status {err.returncode}")
-            return (err.returncode, False)
-
-    # Remove skip actions if present in plan
-    cleaned_plan, plan_cost = parse_plan_filter_skip_actions(unfiltered_plan_file)
-
-    # If cost scaling was done, we need to map back action costs
-    if 'MR' in ae_options and '--no-cost-scaling' not in ae_options:
-        num_zero_cost_ops, original_op_costs_map = parse_original_action_costs()
-        if num_zero_cost_ops != 0:
-            plan_cost = sum([original_op_costs_map[op] for op in cleaned_plan])
+                f"Error while running search for eliminating actions. Exit status {search_returncode}")
+            return (search_returncode, False)
+        return 0, True
 
+    write_plan_if_better(*clean_plan(unfiltered_plan_file, scaled_costs=True))
     os.remove(unfiltered_plan_file)
-    cleaned_plan.append("; cost = %d (%s)" % (plan_cost, "general cost" \
-                        if plan_manager.get_problem_type() == "general cost" else "unit cost"))
-
-    logging.info("Old plan cost: %d" % old_plan_cost)
-    logging.info("New plan cost: %d" % plan_cost)
-
-    # Write cleaned plan to file
-    if old_plan_cost > plan_cost:
-        with open(ae_plan_file, 'w') as found_plan:
-            found_plan.write("\n".join(cleaned_plan))
-            found_plan.write("\n")
 
     return 0, True
@@ -0,0 +1,75 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Benchmark the causal link extraction of the explanation generator.
+Every plan of the given planner (plans/lama-first by default) is matched with
+its PDDL task, the task is translated once and the causal links of the plan
+are extracted. Translated tasks are kept in the work directory, so later runs
+only measure the extraction.
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+from plan_corpus import TRANSLATOR_DIR, get_plans, translate
+
+sys.path.insert(0, str(TRANSLATOR_DIR))
+
+from explanation_redundant_actions import extract_causal_links, get_operators_from_plan
+from plan_parser import parse_plan
+from sas_parser import parse_task
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "suite", nargs="*", default=["all"],
+        help='domains or "<domain>:<plan>" entries to benchmark (default: all)')
+    parser.add_argument(
+        "--planner", default="lama-first",
+        help="subdirectory of plans/ holding the plans (default: %(default)s)")
+    parser.add_argument(
+        "--work-dir", default="benchmark-sas-files",
+        help="directory where translated tasks are stored (default: %(default)s)")
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="extract the causal links of each plan this many times and "
+             "report the fastest run (default: %(default)s)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    total_steps = 0
+    total_links = 0
+    total_time = 0.0
+    print(f"{'plan':<45} {'steps':>7} {'links':>8} {'time [s]':>10}")
+    for (domain_file, problem_file), plan_files in sorted(get_plans(args.planner, args.suite).items()):
+        try:
+            sas_file = translate(domain_file, problem_file, args.work_dir)
+        except Exception as err:
+            print(f"Skipping {problem_file}: translation failed ({err})", file=sys.stderr)
+            continue
+        task, operator_name_to_index = parse_task(sas_file)
+        for plan_file in plan_files:
+            plan, _ = parse_plan(plan_file)
+            plan_operators = get_operators_from_plan(task.operators, plan, operator_name_to_index, True)
+            best_time = float("inf")
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                causal_links, prevail_links = extract_causal_links(task, plan_operators)
+                best_time = min(best_time, time.perf_counter() - start)
+            num_links = len(causal_links) + len(prevail_links)
+            name = f"{plan_file.parent.name}/{plan_file.name}"
+            print(f"{name:<45} {len(plan):>7} {num_links:>8} {best_time:>10.4f}", flush=True)
+            total_steps += len(plan)
+            total_links += num_links
+            total_time += best_time
+    print(f"{'total':<45} {total_steps:>7} {total_links:>8} {total_time:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
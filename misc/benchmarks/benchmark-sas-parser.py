@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Benchmark the bulk SAS parser and the binary task cache against the line
+by line parser on the SAS files found under the given directories (domains/
+by default). All of them must produce the same task. Cache files created by
+the benchmark are removed afterwards.
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+sys.path.insert(0, str(REPO / "src" / "translate"))
+
+from sas_cache import get_cache_file
+from sas_parser import parse_task
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "directories", nargs="*", default=[str(REPO / "domains")],
+        help="directories searched recursively for *.sas files (default: domains/)")
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="parse each file this many times with each parser and report "
+             "the fastest run (default: %(default)s)")
+    return parser.parse_args()
+
+
+def best_time(sas_file, runs, **parse_options):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        task, operator_name_to_index = parse_task(str(sas_file), **parse_options)
+        best = min(best, time.perf_counter() - start)
+    return best, task, operator_name_to_index
+
+
+def main():
+    args = parse_args()
+    sas_files = sorted(sas_file for directory in args.directories for sas_file in Path(directory).rglob("*.sas"))
+    total_line = total_bulk = total_cache = 0.0
+    print(f"{'task':<60} {'size [kB]':>10} {'by line [s]':>12} {'bulk [s]':>10} {'cache [s]':>10} {'speedup':>8}")
+    for sas_file in sas_files:
+        try:
+            line_time, line_task, line_names = best_time(sas_file, args.runs, by_line=True, use_cache=False)
+        except SystemExit as err:
+            print(f"Skipping {sas_file}: {err}", file=sys.stderr)
+            continue
+        bulk_time, bulk_task, bulk_names = best_time(sas_file, args.runs, use_cache=False)
+        cache_file = Path(get_cache_file(str(sas_file)))
+        created_cache = not cache_file.exists()
+        try:
+            # The first parse creates the cache
+            parse_task(str(sas_file), use_cache=True)
+            cache_time, cache_task, cache_names = best_time(sas_file, args.runs, use_cache=True)
+        finally:
+            if created_cache:
+                cache_file.unlink(missing_ok=True)
+        line_lines = list(line_task.get_output_lines())
+        assert line_lines == list(bulk_task.get_output_lines()) == list(cache_task.get_output_lines()), sas_file
+        assert line_names == bulk_names == cache_names, sas_file
+        name = str(sas_file.relative_to(REPO)) if sas_file.is_relative_to(REPO) else str(sas_file)
+        print(f"{name:<60} {sas_file.stat().st_size / 1024:>10.1f} {line_time:>12.4f} {bulk_time:>10.4f} "
+              f"{cache_time:>10.4f} {line_time / cache_time:>7.2f}x", flush=True)
+        total_line += line_time
+        total_bulk += bulk_time
+        total_cache += cache_time
+    print(f"{'total':<60} {'':>10} {total_line:>12.4f} {total_bulk:>10.4f} {total_cache:>10.4f} "
+          f"{total_line / max(total_cache, 1e-9):>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Benchmark the detection of trivially necessary and trivially unnecessary
+actions of the action elimination compilation on synthetic plans of growing
+length. Each plan is a valid random walk over a set of multi-valued
+variables: some values are achieved once and others many times along the
+plan, so both the achievers lookup and the fix point are exercised.
+"""
+
+import argparse
+from contextlib import redirect_stdout
+import io
+from pathlib import Path
+import random
+import sys
+import time
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+sys.path.insert(0, str(REPO / "src" / "translate"))
+
+from action_elim import find_triv_nec_actions, find_triv_unnec_actions
+from sas_tasks import SASGoal, SASInit, SASOperator, SASVariables
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "lengths", nargs="*", type=int, default=[1000, 10000, 100000],
+        help="plan lengths to benchmark (default: 1000 10000 100000)")
+    parser.add_argument(
+        "--variables", type=int, default=50,
+        help="number of variables of the synthetic task (default: %(default)s)")
+    parser.add_argument(
+        "--domain-size", type=int, default=8,
+        help="number of values of each variable (default: %(default)s)")
+    parser.add_argument(
+        "--seed", type=int, default=2023, help="random seed (default: %(default)s)")
+    return parser.parse_args()
+
+
+def generate_task(length, num_variables, domain_size, rng):
+    """
+    Return the init, goal, variables and plan of a synthetic task. A tenth of
+    the variables are "agents" with domain_size values that are achieved many
+    times along the plan. The other variables are "objects" that advance
+    through their values, so most of their values have a single achiever.
+    Most steps advance an object while an agent holds a value and, half of
+    the time, also move another agent. The other steps only move an agent.
+    """
+    num_agents = max(2, num_variables // 10)
+    num_objects = num_variables - num_agents
+    object_domain_size = 2 * length // num_objects + 2
+    ranges = [domain_size] * num_agents + [object_domain_size] * num_objects
+    variables = SASVariables(
+        ranges, [-1] * num_variables,
+        [[f"Atom v{var}-{val}()" for val in range(size)] for var, size in enumerate(ranges)])
+    state = [rng.randrange(size) for size in ranges]
+    init = SASInit(state[:])
+    plan = []
+    for step in range(length):
+        agent, moved_agent = rng.sample(range(num_agents), 2)
+        pre_post = []
+        if rng.random() < 0.8:
+            obj = rng.randrange(num_agents, num_variables)
+            new_val = (state[obj] + 1) % ranges[obj]
+            pre_post.append((obj, state[obj], new_val, []))
+            state[obj] = new_val
+        if not pre_post or rng.random() < 0.5:
+            new_val = rng.randrange(domain_size)
+            pre_post.append((moved_agent, state[moved_agent], new_val, []))
+            state[moved_agent] = new_val
+        plan.append(SASOperator(f"(step{step})", [(agent, state[agent])], pre_post, 1))
+    goal = SASGoal([(var, state[var]) for var in range(num_agents, num_variables)])
+    return init, goal, variables, plan
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    print(f"{'steps':>8} {'triv. nec.':>11} {'fix point':>11} {'triv. unnec.':>13} {'#nec':>7} {'#unnec':>7}")
+    for length in args.lengths:
+        init, goal, variables, plan = generate_task(length, args.variables, args.domain_size, rng)
+        _, nec_time = timed(find_triv_nec_actions, init, goal, variables, plan, False)
+        (triv_nec, fact_achievers), fix_point_time = timed(find_triv_nec_actions, init, goal, variables, plan, True)
+        triv_unnec, unnec_time = timed(find_triv_unnec_actions, init, goal, variables, plan, triv_nec, fact_achievers)
+        print(f"{length:>8} {nec_time:>10.3f}s {fix_point_time:>10.3f}s {unnec_time:>12.3f}s "
+              f"{sum(triv_nec):>7} {sum(triv_unnec):>7}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Generate the explanations of every plan of a planner (plans/lama-first by
+default). Plans are grouped by the PDDL task they solve and every task is
+handled by one worker process, which translates and parses the task once and
+explains all of its plans. The justified plan (with skip actions) of
+plans/<planner>/<domain>/<plan> is read from <skip-plans>/<domain>/<plan>.
+The justified plans are not part of the repository and must be created
+beforehand: they are the plans with skip actions that the search finds for
+the action elimination task of each plan (see src/translate/action_elim.py),
+stored with the name of the original plan.
+
+The batch mode records of every plan are written as JSON Lines, each tagged
+with its domain and plan. Plans that cannot be explained produce an "error"
+record. The last record sums the time spent in each stage.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+from plan_corpus import TRANSLATOR_DIR, get_plans, translate
+
+sys.path.insert(0, str(TRANSLATOR_DIR))
+
+from explanation_redundant_actions import (EXPLAIN_ALL, build_explanation_index, explanation_records,
+                                           is_perfectly_justified, parse_action_numbers, plan_record)
+from plan_parser import parse_plan
+from sas_parser import parse_task
+
+
+STAGES = ["translate", "parse_task", "parse_plans", "build_index", "explain"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "suite", nargs="*", default=["all"],
+        help='domains or "<domain>:<plan>" entries to explain (default: all)')
+    parser.add_argument(
+        "--planner", default="lama-first",
+        help="subdirectory of plans/ holding the plans (default: %(default)s)")
+    parser.add_argument(
+        "--skip-plans", default="skip-plans",
+        help="directory holding the justified plans as <domain>/<plan>, which must be "
+             "created beforehand (default: %(default)s)")
+    parser.add_argument(
+        "--work-dir", default="benchmark-sas-files",
+        help="directory where translated tasks are stored (default: %(default)s)")
+    parser.add_argument(
+        "--subsequence", action="store_true",
+        help="the justified plans maintain the order of the original actions")
+    parser.add_argument(
+        "--explain", type=parse_action_numbers, default=EXPLAIN_ALL,
+        help="actions to explain: 'all' or a comma-separated list of action numbers (default: all)")
+    parser.add_argument(
+        "--objects", action="store_true", help="obtain the irrelevant objects of each plan")
+    parser.add_argument(
+        "--chains", action="store_true", help="obtain the causal chains of each plan")
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count(),
+        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument(
+        "-o", "--output", default="-",
+        help="file where the JSON Lines are written ('-' for stdout, the default)")
+    return parser.parse_args()
+
+
+def explain_task(domain_file, problem_file, plan_files, args):
+    """
+    Explain all plans of a task. Returns the records of its plans and the time spent in each stage.
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
+    records = []
+
+    def tag(record, plan_file):
+        return dict(record, domain=plan_file.parent.name, plan=plan_file.name)
+
+    start = time.perf_counter()
+    try:
+        sas_file = translate(domain_file, problem_file, args.work_dir)
+    except Exception as err:
+        return [tag({"type": "error", "error": f"translation failed ({err})"}, plan_file)
+                for plan_file in plan_files], timings
+    timings["translate"] += time.perf_counter() - start
+
+    task = None
+    for plan_file in plan_files:
+        skip_plan_file = Path(args.skip_plans) / plan_file.parent.name / plan_file.name
+        if not skip_plan_file.exists():
+            records.append(tag({"type": "error", "error": f"missing justified plan {skip_plan_file}"}, plan_file))
+            continue
+
+        # Errors of a plan (or of its task) only produce an error record, so the other plans are still explained.
+        # The parser exits on unsupported tasks, e.g. with axioms.
+        try:
+            start = time.perf_counter()
+            plan, plan_cost = parse_plan(plan_file)
+            ae_plan, plan_ae_cost = parse_plan(skip_plan_file)
+            timings["parse_plans"] += time.perf_counter() - start
+
+            explain = args.explain
+            if explain != EXPLAIN_ALL:
+                explain = [action_number for action_number in explain if action_number <= len(plan)]
+            plan_records = [plan_record(str(plan_file), str(skip_plan_file), plan, plan_cost, ae_plan, plan_ae_cost)]
+            if not is_perfectly_justified(ae_plan):
+                if task is None:
+                    # The task is only parsed if one of its plans is not perfectly justified
+                    start = time.perf_counter()
+                    task, operator_name_to_index = parse_task(sas_file)
+                    timings["parse_task"] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                index = build_explanation_index(task, operator_name_to_index, plan, ae_plan, args.subsequence)
+                timings["build_index"] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                plan_records += list(explanation_records(index, explain, args.objects, args.chains))
+                timings["explain"] += time.perf_counter() - start
+        except (Exception, SystemExit) as err:
+            records.append(tag({"type": "error", "error": f"explanation failed ({err!r})"}, plan_file))
+        else:
+            records += [tag(record, plan_file) for record in plan_records]
+
+    return records, timings
+
+
+def main():
+    args = parse_args()
+    tasks = get_plans(args.planner, args.suite)
+    total_timings = dict.fromkeys(STAGES, 0.0)
+    num_plans = num_errors = 0
+    start = time.perf_counter()
+    with open(args.output, "w") if args.output != "-" else nullcontext(sys.stdout) as stream, \
+         ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(explain_task, domain_file, problem_file, plan_files, args)
+                   for (domain_file, problem_file), plan_files in sorted(tasks.items())]
+        for future in as_completed(futures):
+            records, timings = future.result()
+            for record in records:
+                stream.write(json.dumps(record) + "\n")
+                num_plans += record["type"] == "plan"
+                num_errors += record["type"] == "error"
+            for stage, stage_time in timings.items():
+                total_timings[stage] += stage_time
+            stream.flush()
+        stream.write(json.dumps({"type": "summary", "tasks": len(tasks), "plans": num_plans, "errors": num_errors,
+                                 "wall_time": time.perf_counter() - start, "stage_times": total_timings}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Helpers to map the plans stored in plans/<planner>/<domain>/ to the PDDL
+tasks in domains/ and to translate these tasks into SAS+ files.
+"""
+
+from collections import defaultdict
+from pathlib import Path
+import re
+import subprocess
+import sys
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATOR_DIR = REPO / "src" / "translate"
+TRANSLATOR = TRANSLATOR_DIR / "translate.py"
+PLANS_DIR = REPO / "plans"
+# Benchmark sets holding the satisficing tasks solved by the planners in plans/.
+TASK_DIRS = [
+    REPO / "domains" / "ipc2014" / "seq-agl",
+    REPO / "domains" / "ipc2014" / "seq-agl-conditional",
+    REPO / "domains" / "ipc2018" / "sat",
+    REPO / "domains" / "ipc2018" / "sat-cond-eff",
+]
+# Plan directories named differently than the benchmark domain.
+DOMAIN_ALIASES = {
+    "calderasplit": "caldera-split",
+}
+
+
+def find_task(domain, plan_file):
+    """Return the (domain, problem) PDDL paths solved by plan_file or None."""
+    match = re.search(r"(\d+)\.solution$", plan_file.name)
+    if not match:
+        return None
+    problem_name = f"p{int(match.group(1)):02d}.pddl"
+    for task_dir in TASK_DIRS:
+        domain_dir = task_dir / DOMAIN_ALIASES.get(domain, domain)
+        problem_file = domain_dir / problem_name
+        if not problem_file.exists():
+            continue
+        domain_file = domain_dir / "domain.pddl"
+        if not domain_file.exists():
+            domain_file = domain_dir / f"domain-{problem_name}"
+        if domain_file.exists():
+            return domain_file, problem_file
+    return None
+
+
+def get_plans(planner, suite):
+    """
+    Return a dict mapping (domain file, problem file) to the sorted list of
+    plan files of the given planner solving that task. The suite contains
+    domain names or "<domain>:<plan>" entries, "all" selects every plan.
+    """
+    planner_dir = PLANS_DIR / planner
+    selected = set(suite)
+    tasks = defaultdict(list)
+    for domain_dir in sorted(planner_dir.iterdir()):
+        if not domain_dir.is_dir():
+            continue
+        for plan_file in sorted(domain_dir.glob("*.solution")):
+            name = f"{domain_dir.name}:{plan_file.name}"
+            if "all" not in selected and domain_dir.name not in selected and name not in selected:
+                continue
+            task = find_task(domain_dir.name, plan_file)
+            if task is None:
+                print(f"Skipping {name}: no PDDL task found", file=sys.stderr)
+                continue
+            tasks[task].append(plan_file)
+    return tasks
+
+
+def translate(domain_file, problem_file, work_dir):
+    """Translate the task into work_dir (once) and return the SAS+ file."""
+    sas_file = Path(work_dir) / problem_file.parent.name / f"{problem_file.stem}.sas"
+    if not sas_file.exists():
+        sas_file.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.check_call(
+            [sys.executable, str(TRANSLATOR), str(domain_file), str(problem_file),
+             "--sas-file", str(sas_file)],
+            stdout=subprocess.DEVNULL)
+    return sas_file
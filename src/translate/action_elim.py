@@ -25,11 +25,12 @@ import os.path
 import sys
 from time import process_time
 from math import inf, ceil
-from copy import deepcopy
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappush, heappop
 
-from plan_parser import parse_plan
+from plan_parser import parse_plan, write_plan, PlanStep
 from sas_parser import parse_task
-from sas_tasks import SASTask, SASVariables, SASOperator, SASInit, SASGoal, SASAxiom, SASMutexGroup
+from sas_tasks import SASTask, SASVariables, SASOperator, SASInit, SASGoal, SASAxiom, SASMutexGroup, ValueNameTable
 from simplify import TriviallySolvable, filter_unreachable_propositions
 from variable_order import find_and_apply_variable_order
 
@@ -43,7 +44,15 @@ MACRO_OP_STRING = "-triv-nec-macro-"
 ORGINAL_OP_COSTS_FILE = 'original-op-costs.txt'
 
 # Clean domains as proposed by Jendrik (I think)
-def create_action_elim_task(sas_task, plan, operator_name_to_index, ordered, enhanced, reduction, add_pos_to_goal, enhanced_fix_point, enhanced_unnecessary, use_macro_ops, scale_costs):
+def create_action_elim_task(sas_task, plan, operator_name_to_index, ordered, enhanced, reduction, add_pos_to_goal, enhanced_fix_point, enhanced_unnecessary, use_macro_ops, scale_costs, costs_file=ORGINAL_OP_COSTS_FILE, greedy=False, greedy_plan_file=None):
+    if greedy or greedy_plan_file:
+        reduced_plan = greedy_eliminate_actions(sas_task, plan, operator_name_to_index)
+        # The reduced plan is a valid plan of the original task, which can be used before the task is solved
+        if greedy_plan_file:
+            write_reduced_plan(sas_task, reduced_plan, operator_name_to_index, greedy_plan_file)
+        if greedy:
+            plan = reduced_plan
+
     # Process operators. Later on, variable to maintain order of actions will be var_(n + 1) (n=num vars originally)
     print("Plan length:", len(plan))
     print("Unique operators in plan:", len(set(plan)))
@@ -76,7 +85,7 @@ def create_action_elim_task(sas_task, plan, operator_name_to_index, ordered, enh
         }
 
         # Store original operator costs
-        with open(ORGINAL_OP_COSTS_FILE, 'w') as original_costs_file:
+        with open(costs_file, 'w') as original_costs_file:
             original_costs_file.write(json.dumps(cost_scaling_info))
 
     if ordered and enhanced:
@@ -133,14 +142,17 @@ def create_action_elim_task(sas_task, plan, operator_name_to_index, ordered, enh
 
 def get_operators_from_plan(operators, plan, operator_name_to_index, ordered):
     if ordered:
-        # Ordered tasks create a different operator for each operator in the plan
-        return [deepcopy(operators[operator_name_to_index[op]]) for op in plan]
+        # Ordered tasks create a different step for each operator in the plan. Steps share the operator
+        # of the task, changes made to a step (e.g. cost scaling) do not affect the other steps.
+        return [PlanStep(index, operators[operator_name_to_index[op]]) for index, op in enumerate(plan)]
     else:
-        # Unordered tasks create a different operator for each unique operator in the plan
+        # Unordered tasks create a different operator for each unique operator in the plan. These are also
+        # steps, so that the operators of the task are not modified and the task can be reused.
         added = set()
         # added.add(op) is only used for its' side effects.
         # set.add(x) always returns None so it doesn't affect the condition
-        return [operators[operator_name_to_index[op]] for op in plan if not (op in added or added.add(op))]
+        unique_ops = [op for op in plan if not (op in added or added.add(op))]
+        return [PlanStep(index, operators[operator_name_to_index[op]]) for index, op in enumerate(unique_ops)]
 
 
 def compute_mult_factor(new_operators):
@@ -288,13 +300,13 @@ def prune_irrelevant_domain_values(variables, is_fact_relevant, plan, ordered):
     new_ranges = []
 
     # For each relevant fact, add to new domain
-    for var, rel_facts in enumerate(is_fact_relevant):
+    for var, (rel_facts, val_names) in enumerate(zip(is_fact_relevant, variables.value_names)):
         next_val = 0
         current_val_names = []
         for val, is_rel in enumerate(rel_facts):
             if is_rel:
                 vars_new_vals_map[var][val] = next_val
-                current_val_names.append(variables.value_names[var][val])
+                current_val_names.append(val_names[val])
                 next_val += 1
         # Irrelevant facts will al be mapped to a new domain value
         # This will potentially reduce the domain size of the variables
@@ -314,7 +326,7 @@ def prune_irrelevant_domain_values(variables, is_fact_relevant, plan, ordered):
         vars_new_vals_map.append([i for i in range(len(plan) + 1)])
         is_fact_relevant.append([True] * (len(plan) + 1))
 
-    return SASVariables(ranges=new_ranges, axiom_layers=new_axiom_layers, value_names=new_value_names)\
+    return SASVariables(ranges=new_ranges, axiom_layers=new_axiom_layers, value_names=ValueNameTable(new_value_names))\
            , vars_new_vals_map
 
 
@@ -346,7 +358,7 @@ def process_operators(operators, is_fact_relevant, vars_vals_map, variables, ord
 
         # For MLR we need op_cost of 1 and skip actions of cost=0
         # For MR we need to maintain the operators' original cost
-        op_cost = op.cost if use_costs or getattr(op, 'is_macro', False) else 1
+        op_cost = op.cost if use_costs or op.is_macro else 1
         processed_operators.append(SASOperator(name=op.name, prevail=new_prev, pre_post=new_pre_post, cost=op_cost))
 
     return processed_operators
@@ -395,6 +407,70 @@ def process_axioms(axioms, variables, vars_vals_map, is_fact_relevant):
     return new_axioms
 
 
+# Achievers of each fact in a plan: for each fact, the plan positions that achieve it (-1 is the initial state)
+# in increasing order. When a triv. nec. action at position p overwrites a variable, the achievers of the other
+# values of the variable that start before p are achievers at most until p. Each variable keeps these cutoff
+# positions sorted, so capping the achievers of all the values of a variable is a single insertion and the
+# achievers of a fact at a plan step, those after the last cutoff, are a contiguous range found with bisect.
+class FactAchievers:
+    def __init__(self, init, variables, plan):
+        self.starts = [[[] for _ in range(dom_size)] for dom_size in variables.ranges]
+        # For each var, the sorted cutoff positions and, for each of them, the value whose achievers are not capped
+        # (the value set by the triv. nec. action) or None if the achievers of every value are capped
+        self.cutoffs = [[] for _ in variables.ranges]
+        self.kept_values = [{} for _ in variables.ranges]
+        self.plan_length = len(plan)
+
+        # Facts achieved by the initial state
+        for var, val in enumerate(init.values):
+            self.starts[var][val].append(-1)
+
+        # For each operator what facts they achieve
+        for index, op in enumerate(plan):
+            for var, _, new_val, _  in op.pre_post:
+                self.starts[var][new_val].append(index)
+
+    # Last cutoff of var before op_index that caps the achievers of val, or None if there is none
+    def last_cutoff(self, var, val, op_index):
+        cutoffs, kept_values = self.cutoffs[var], self.kept_values[var]
+        pos = bisect_left(cutoffs, op_index) - 1
+        # Only a triv. nec. action setting var=val keeps the achievers of val, hardly ever several in a row
+        while pos >= 0 and kept_values[cutoffs[pos]] == val:
+            pos -= 1
+        return cutoffs[pos] if pos >= 0 else None
+
+    # Range [lo, hi) of the achievers of var=val at plan step op_index:
+    # those that start before op_index and are not capped before op_index
+    def get_achievers(self, var, val, op_index):
+        starts = self.starts[var][val]
+        hi = bisect_left(starts, op_index)
+        cutoff = self.last_cutoff(var, val, op_index)
+        lo = bisect_left(starts, cutoff, 0, hi) if cutoff is not None else 0
+        return lo, hi
+
+    # Achievers of every value of var except new_val that start before position are achievers at most until position.
+    # Returns the last plan step whose achievers of var may have changed or None if no achiever changed
+    def cap(self, var, new_val, position):
+        cutoffs, kept_values = self.cutoffs[var], self.kept_values[var]
+        if position in kept_values:
+            # Another effect of the same action on var: only the values kept by both effects stay uncapped
+            if kept_values[position] in (None, new_val):
+                return None
+            kept_values[position] = None
+        else:
+            insort(cutoffs, position)
+            kept_values[position] = new_val
+
+        # The achievers change until the next cutoff that caps every value changed by this one
+        pos = bisect_right(cutoffs, position)
+        if pos == len(cutoffs):
+            return self.plan_length
+        next_kept = kept_values[cutoffs[pos]]
+        while next_kept is not None and pos < len(cutoffs) and kept_values[cutoffs[pos]] == next_kept:
+            pos += 1
+        return cutoffs[pos] if pos < len(cutoffs) else self.plan_length
+
+
 # With a task and a plan, finds trivially necessary actions in the plan. (related to landmarks)
 # When solving MR and MLR (action order maintained), trivially necessary actions are those that cannot be skipped.
 # Either because they are the only action that achieves a goal
@@ -404,17 +480,7 @@ def find_triv_nec_actions(init, goal, variables, plan, reach_fix_point):
     init_time = process_time()
 
     # Find achievers for each fact
-    fact_achievers = [[[] for _ in range(dom_size)] for dom_size in variables.ranges]
-
-    # Facts achieved by the initial state
-    for var, val in enumerate(init.values):
-        fact_achievers[var][val].append([-1, len(plan) + 2])
-
-    # For each operator what facts they achieve
-    for index, op in enumerate(plan):
-        for var, _, new_val, _  in op.pre_post:
-            # Keeping track of until when a value is true. When a new triv. nec. action is found this value might be updated
-            fact_achievers[var][new_val].append([index, len(plan) + 2])
+    fact_achievers = FactAchievers(init, variables, plan)
 
     # Add virtual goal action. prevail is goal conditions, used for ease of implementation
     virtual_goal_action = SASOperator(name='virtual_goal', prevail=[(var, val) for var, val in goal.pairs], pre_post=[], cost=0)
@@ -422,6 +488,17 @@ def find_triv_nec_actions(init, goal, variables, plan, reach_fix_point):
     extended_plan = plan[:]
     extended_plan.append(virtual_goal_action)
 
+    # For each variable, the operators (in plan order) that may need one of its values
+    var_readers = [[] for _ in variables.ranges]
+    for op_index, op in enumerate(extended_plan):
+        for var, _ in op.prevail:
+            var_readers[var].append(op_index)
+        for var, val, _, eff_conditions in op.pre_post:
+            if val > -1:
+                var_readers[var].append(op_index)
+            for cond_var, _ in eff_conditions:
+                var_readers[cond_var].append(op_index)
+
     # List to store what operators are triv. nec. If an op. is triv. nec., is because one of it's effects is needed
     # Here we keep track of what effects (var, new_val) make each operator triv. nec.
     # An empty means the operator is not triv. nec.
@@ -429,41 +506,56 @@ def find_triv_nec_actions(init, goal, variables, plan, reach_fix_point):
 
     # The virtual goal is triv. nec., but by definition and not because of it's effects
     triv_nec[-1] = (set([-1]))
-    is_fix_point = False
-
-    while not is_fix_point:
-        is_fix_point = True
-        # Check, in reverse order, for trivially nec actions
-        for op_index in range(len(extended_plan) - 1, -1, -1):
-            # If current act is triv. nec, its' preconds are neccessary
-            if triv_nec[op_index]:
-                current_op = extended_plan[op_index]
-                for var, val in current_op.prevail:
-                    # Find achievers for current precondition at current plan step.
-                    current_achievers = [achiever[0] for achiever in fact_achievers[var][val] if achiever[0] < op_index and achiever[1] >= op_index]
-
-                    # If the op. is triv nec, update the fact achievers information
-                    if check_and_update_triv_nec(var, val, current_achievers, triv_nec) and reach_fix_point:
-                        update_achievers(current_achievers[0], extended_plan[current_achievers[0]], fact_achievers, triv_nec)
-                        is_fix_point = False
-
-                # Now checking for preconditions in pre_post.
-                for var, val, new_val, eff_conditions in current_op.pre_post:
-                    # If there are no effect conditions, the pre is necessary
-                    # If there are effect conditions and this particular effect was the reason the current op. was labeled as triv. nec
-                    # Then all it's effect conditions are necessary
-                    if not eff_conditions or (var, new_val) in triv_nec[op_index]:
-                        current_achievers = [achiever[0] for achiever in fact_achievers[var][val] if achiever[0] < op_index and achiever[1] >= op_index]
-                        if check_and_update_triv_nec(var, val, current_achievers, triv_nec) and reach_fix_point:
-                            update_achievers(current_achievers[0], extended_plan[current_achievers[0]], fact_achievers, triv_nec)
-                            is_fix_point = False
-
-                        # Check for new triv. nec. ops in the effect conditions
-                        for (cond_var, cond_val) in eff_conditions:
-                            current_achievers = [achiever[0] for achiever in fact_achievers[cond_var][cond_val] if achiever[0] < op_index and achiever[1] >= op_index]
-                            if check_and_update_triv_nec(cond_var, cond_val, current_achievers, triv_nec) and reach_fix_point:
-                                update_achievers(current_achievers[0], extended_plan[current_achievers[0]], fact_achievers, triv_nec)
-                                is_fix_point = False
+
+    # Worklist of triv. nec. operators whose preconditions must be checked, the last operator first.
+    # An operator is checked again only if it becomes triv. nec. because of another effect or if the achievers
+    # of one of its preconditions change.
+    worklist = []
+    in_worklist = set()
+
+    def push(op_index):
+        if op_index not in in_worklist:
+            in_worklist.add(op_index)
+            heappush(worklist, -op_index)
+
+    def check_precondition(var, val, op_index):
+        # Wildcard preconditions have no achievers
+        if val < 0:
+            return
+        # Find achievers for current precondition at current plan step. Two achievers are enough to know it is not triv. nec.
+        lo, hi = fact_achievers.get_achievers(var, val, op_index)
+        current_achievers = fact_achievers.starts[var][val][lo:min(hi, lo + 2)]
+        if check_and_update_triv_nec(var, val, current_achievers, triv_nec):
+            push(current_achievers[0])
+            # If the op. is triv nec, update the fact achievers information
+            if reach_fix_point:
+                for capped_var, position, last_changed in update_achievers(current_achievers[0], extended_plan[current_achievers[0]], fact_achievers, triv_nec):
+                    # Triv. nec. operators that read the var between the new triv. nec. op. and the last changed step must be checked again
+                    readers = var_readers[capped_var]
+                    for reader in readers[bisect_right(readers, position):bisect_right(readers, last_changed)]:
+                        if triv_nec[reader]:
+                            push(reader)
+
+    push(len(extended_plan) - 1)
+    while worklist:
+        op_index = -heappop(worklist)
+        in_worklist.remove(op_index)
+        # If current act is triv. nec, its' preconds are neccessary
+        current_op = extended_plan[op_index]
+        for var, val in current_op.prevail:
+            check_precondition(var, val, op_index)
+
+        # Now checking for preconditions in pre_post.
+        for var, val, new_val, eff_conditions in current_op.pre_post:
+            # If there are no effect conditions, the pre is necessary
+            # If there are effect conditions and this particular effect was the reason the current op. was labeled as triv. nec
+            # Then all it's effect conditions are necessary
+            if not eff_conditions or (var, new_val) in triv_nec[op_index]:
+                check_precondition(var, val, op_index)
+
+                # Check for new triv. nec. ops in the effect conditions
+                for (cond_var, cond_val) in eff_conditions:
+                    check_precondition(cond_var, cond_val, op_index)
 
     print(f"Trivially necessary actions time: {process_time() - init_time:.3f}")
     print(f"Number of triv. nec. actions: {sum(1 for elem in triv_nec if elem)}")
@@ -472,23 +564,19 @@ def find_triv_nec_actions(init, goal, variables, plan, reach_fix_point):
 
 # When a new triv. nec. action was found, update the fact achievers
 # Using prepost the triv. nec. operator, change until when each achiever
-# is actually an achiever.
+# is actually an achiever. Returns (var, position, last_changed) for each var whose achievers may have changed.
 def update_achievers(triv_nec_op_index, triv_nec_op, fact_achievers, triv_nec):
+    changed = []
     # For each variable in the pre_post
     for var, _, new_val, eff_conditons in triv_nec_op.pre_post:
         # If there are no effect conditions, always update achiever information
         # Otherwise, only update information if this op. was labeled as triv. nec. because of this effect
         if not eff_conditons or (var, new_val) in triv_nec[triv_nec_op_index]:
-            # For each val of the var
-            for var_value, var_value_achievers in enumerate(fact_achievers[var]):
-                if var_value != new_val:
-                    # For each achiever of the val
-                    for achiever in var_value_achievers:
-                        # If the op. index is greater than operator used to update, break (ordered list)
-                        if achiever[0] >= triv_nec_op_index:
-                            break
-                        # Else, update the last index in which this operator is an achiever for this var=val
-                        achiever[1] = min(triv_nec_op_index, achiever[1])
+            # Update the last index in which the achievers of the other values of the var before the operator are achievers
+            last_changed = fact_achievers.cap(var, new_val, triv_nec_op_index)
+            if last_changed is not None:
+                changed.append((var, triv_nec_op_index, last_changed))
+    return changed
 
 
 # Checks if a new triv. nec. op was discovered and adds it to the list of triv. nec. ops if it was
@@ -516,25 +604,33 @@ def find_triv_unnec_actions(init, goal, variables, plan, triv_nec, fact_achiever
     # For each action (index) what actions (possibly) consume its' effects on a variable
     producer_consumer = [set() for _ in extended_plan]
 
-    # Keep track of variables overwritten by triv. nec. actions
+    # Keep track of variables overwritten by triv. nec. actions, in plan order
     fact_overwritten = [[] for _ in variables.ranges]
     triv_unnec = [False for _ in extended_plan]
 
+    # All posible producers of a precondition are the achievers of the fact at the consumer's plan step
+    def add_consumer(var, val, index):
+        lo, hi = fact_achievers.get_achievers(var, val, index)
+        for producer_index in fact_achievers.starts[var][val][lo:hi]:
+            if producer_index > -1:
+                producer_consumer[producer_index].add((index, var))
+
     for index, op in enumerate(extended_plan):
         for var, old_val, new_val, _  in op.pre_post:
             if triv_nec[index]:
                 fact_overwritten[var].append(index)
-            # All posible producers of this preconditon
+            # For each operator, which values it produces are read by what other operators
             if old_val > -1:
-                # For each operator, which values it produces are read by what other operators
-                for producer_index in fact_achievers[var][old_val]:
-                    if producer_index[0] > -1 and producer_index[0] < index <= producer_index[1]:
-                        producer_consumer[producer_index[0]].add((index, var))
+                add_consumer(var, old_val, index)
 
         for var, val in op.prevail:
-            for producer_index in fact_achievers[var][val]:
-                if producer_index[0] > -1 and producer_index[0] < index <= producer_index[1]:
-                    producer_consumer[producer_index[0]].add((index, var))
+            add_consumer(var, val, index)
+
+    # True if a triv. nec. action overwrites var after op_index and before consumer_index
+    def is_overwritten(var, op_index, consumer_index):
+        over_writers = fact_overwritten[var]
+        pos = bisect_right(over_writers, op_index)
+        return pos < len(over_writers) and over_writers[pos] < consumer_index
 
     # Check, in reverse order, for trivially unnec. actions
     for op_index in range(len(extended_plan) - 1, -1, -1):
@@ -546,17 +642,69 @@ def find_triv_unnec_actions(init, goal, variables, plan, triv_nec, fact_achiever
         is_unnec = all(triv_unnec[consumer[0]] for consumer in producer_consumer[op_index])
 
         if not is_unnec:
-            is_unnec = True
-            for consumer_index, var in producer_consumer[op_index]:
-                # For each consumer, at least one triv. nec. action overwrites the var before it's read!
-                is_unnec &= any(op_index < over_writer < consumer_index for over_writer in fact_overwritten[var])
+            # For each consumer, at least one triv. nec. action overwrites the var before it's read!
+            is_unnec = all(is_overwritten(var, op_index, consumer_index) for consumer_index, var in producer_consumer[op_index])
 
         triv_unnec[op_index] = is_unnec
 
     return triv_unnec
 
 
-def main():
+# Greedy action elimination (Fink and Yang, 1992). Tries to remove each action of the plan, in order, together with
+# the later actions that are no longer applicable without it, and keeps the removal if the rest of the plan still
+# achieves the goal. The reduced plan is valid and not more expensive, but it might not be a minimal reduction.
+def greedy_eliminate_actions(sas_task, plan, operator_name_to_index):
+    if sas_task.axioms:
+        print("Greedy action elimination does not support axioms. The plan is not reduced.")
+        return plan
+
+    init_time = process_time()
+    operators = [sas_task.operators[operator_name_to_index[op]] for op in plan]
+    # Triv. nec. actions are part of every valid subsequence of the plan, removing them is not tried
+    triv_nec, _ = find_triv_nec_actions(sas_task.init, sas_task.goal, sas_task.variables, operators, False)
+
+    # Positions of the actions kept so far and state before the action at kept[pos]
+    kept = list(range(len(plan)))
+    state = list(sas_task.init.values)
+    pos = 0
+    while pos < len(kept):
+        if not triv_nec[kept[pos]]:
+            new_state = state[:]
+            remaining = [index for index in kept[pos + 1:] if apply_if_applicable(operators[index], new_state)]
+            if all(new_state[var] == val for var, val in sas_task.goal.pairs):
+                kept[pos:] = remaining
+                continue
+        apply_if_applicable(operators[kept[pos]], state)
+        pos += 1
+
+    print(f"Greedy action elimination time: {process_time() - init_time:.3f}")
+    print(f"Number of actions removed by greedy action elimination: {len(plan) - len(kept)}")
+    return [plan[index] for index in kept]
+
+
+def write_reduced_plan(sas_task, plan, operator_name_to_index, plan_file):
+    if sas_task.metric:
+        cost = sum(sas_task.operators[operator_name_to_index[op]].cost for op in plan)
+        cost_type = "general cost"
+    else:
+        cost = len(plan)
+        cost_type = "unit cost"
+    write_plan(plan_file, plan, cost, cost_type)
+
+
+# Applies op to state if its preconditions hold. Effect conditions are evaluated in the state before applying op
+def apply_if_applicable(op, state):
+    if any(state[var] != val for var, val in op.prevail) or \
+       any(pre > -1 and state[var] != pre for var, pre, _, _ in op.pre_post):
+        return False
+    effects = [(var, post) for var, _, post, eff_conditions in op.pre_post
+               if all(state[cond_var] == cond_val for cond_var, cond_val in eff_conditions)]
+    for var, post in effects:
+        state[var] = post
+    return True
+
+
+def parse_args(args=None):
     parser = argparse.ArgumentParser(description=__doc__,formatter_class=argparse.RawTextHelpFormatter)
     required_named = parser.add_argument_group('required named arguments')
     required_named.add_argument('-t', '--task', help='Path to task file in SAS+ format.',type=str, required=True)
@@ -567,33 +715,55 @@ def main():
     parser.add_argument('--enhanced-unnecessary', help='Compiled task only includes actions that are not trivially unnecessary', action='store_true', default=False)
     parser.add_argument('--add-pos-to-goal', help='Add position variable to goals', action='store_true', default=False)
     parser.add_argument('--enhanced-fix-point', help='Iteratively find triv. nec. actions until a fixpoint is reached', action='store_true', default=False)
+    parser.add_argument('--greedy', help='Remove actions of the plan greedily before creating the task. The compiled task eliminates actions of the reduced plan, which might not contain the best reduction of the original plan', action='store_true', default=False)
+    parser.add_argument('--greedy-plan-file', help='File where the plan reduced by greedy action elimination is stored, with or without --greedy',type=str, default=None)
     parser.add_argument('--reduction', help='MR or MLR. MR=minimal reduction, MLR=minimal length reduction',type=str, default=MR)
-    # Remove -f option for simplicity. Might want to add this again later
-    # parser.add_argument('-f', '--file', help='Output file where reformulated SAS+ will be stored',type=str,default='minimal-reduction.sas')
+    parser.add_argument('-f', '--file', help='Output file where reformulated SAS+ will be stored, relative to the output directory (default: action-elimination.sas)',type=str, default=None)
     parser.add_argument('-d', '--directory', help='Output directory',type=str, default='.')
+    parser.add_argument('--costs-file', help=f'File where the original operator costs are stored if costs are scaled (default: <directory>/{ORGINAL_OP_COSTS_FILE})',type=str, default=None)
     parser.add_argument('--no-cost-scaling', dest="scale_costs", help='Do not scale costs even if the input task contains zero-cost actions. Using this option means that plans found with MR might not be perfectly justified.', action='store_false', default=True)
-    options = parser.parse_args()
-    options.file = 'action-elimination.sas'
+    parser.add_argument('--cache-task', help='Read the input task from a binary cache next to it (<task>.cache), which is created if it does not exist. Speeds up creating several tasks for the same input task', action='store_true', default=False)
+    parser.add_argument('--gzip', help='Compress the output task with gzip (action-elimination.sas.gz)', action='store_true', default=False)
+    options = parser.parse_args(args)
+    if options.file is None:
+        options.file = 'action-elimination.sas'
+    if options.gzip and not options.file.endswith('.gz'):
+        options.file += '.gz'
+    if options.costs_file is None:
+        options.costs_file = os.path.join(options.directory, ORGINAL_OP_COSTS_FILE)
 
     if options.task == None or options.plan == None:
         parser.print_help()
         sys.exit(2)
+    return options
+
+
+def eliminate_actions(task, operator_name_to_index, plan, options):
+    """
+    Creates the action elimination task of the plan with the given options (see parse_args).
+    The task is not modified, so a parsed task can be used for several plans.
+    """
+    return create_action_elim_task(task, plan, operator_name_to_index, options.subsequence, \
+                                   options.enhanced, options.reduction, options.add_pos_to_goal, \
+                                   options.enhanced_fix_point, options.enhanced_unnecessary, \
+                                   options.macro_operators, options.scale_costs, options.costs_file, \
+                                   options.greedy, options.greedy_plan_file)
+
+
+def main():
+    options = parse_args()
 
     parse_input_sas_time = process_time()
-    task, operator_name_to_index_map = parse_task(options.task)
+    task, operator_name_to_index_map = parse_task(options.task, use_cache=options.cache_task)
     plan, plan_cost = parse_plan(options.plan)
     parse_input_sas_time = process_time() - parse_input_sas_time
     print(f"Parse input SAS task and plan time: {parse_input_sas_time:.3f}")
 
     # Measure create task time
     create_task_time = process_time()
-    new_task = create_action_elim_task(task, plan, operator_name_to_index_map, options.subsequence, \
-                                       options.enhanced, options.reduction, options.add_pos_to_goal, \
-                                       options.enhanced_fix_point, options.enhanced_unnecessary, \
-                                       options.macro_operators, options.scale_costs)
+    new_task = eliminate_actions(task, operator_name_to_index_map, plan, options)
 
-    with open(os.path.join(options.directory, options.file), mode='w') as output_file:
-        new_task.output(stream=output_file)
+    new_task.write(os.path.join(options.directory, options.file))
 
     create_task_time = process_time() - create_task_time
     print(f"Create AE task time: {create_task_time:.3f}")
@@ -16,27 +16,35 @@ TODO: explain the stuff
 
 
 import argparse
-import subprocess
+import json
+import os
 import sys
-from copy import deepcopy
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import redirect_stdout, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bisect import bisect_left
 
 
-from plan_parser import parse_plan
+from plan_parser import parse_plan, PlanStep
 from sas_parser import parse_task
 
+NO_CAUSAL_CHAINS_STR = "There are no unnecessary or non-justified causal chains of actions because the Relevant Actions of the justified plan do not consume facts produced by Redundant Actions in the unjustified plan."
+# Answer of --explain that selects every action of the plan
+EXPLAIN_ALL = 'all'
+
 def get_operators_from_plan(operators, plan, operator_name_to_index, ordered):
 
     plan_operators= []
     added = set()
     
-    for op in plan:   
+    for index, op in enumerate(plan):
         if 'skip-action' in op:
             plan_operators += [None]
         else:    
             if ordered:
-                # Ordered tasks create a different operator for each operator in the plan
-                plan_operators += [deepcopy(operators[operator_name_to_index[op]])]
+                # Ordered tasks create a different step for each operator in the plan, sharing the operator of the task
+                plan_operators += [PlanStep(index, operators[operator_name_to_index[op]])]
             else:
                 # Unordered tasks create a different operator for each unique operator in the plan
                 # added.add(op) is only used for its' side effects.
@@ -53,113 +61,93 @@ def is_perfectly_justified(plan):
     return True
 
 
-# TODO: revise this code. It was modified to make it more readable
-def get_var_pre_post_list(operators): 
-    """
-    Obtains a list where each position represents an action, and contains a list of tuples in the form 
-    [list of (var, precond_val), list of (var, prevail_val), list of (var, eff_val)]
-      """
-    op_precond_list = []
-    op_prevail_list = [] 
-    op_eff_list = []  
-      
-    for op in operators:
-        op_precond = []
-        op_prevail = []
-        op_eff = []
-        
-        if not op is None:
-            for prevail_val in op.prevail:
-                op_prevail+= [(prevail_val[0], prevail_val[1])]
-
-        if not op is None:
-            for var, precond_val, eff_val, _ in op.pre_post:
-                op_precond += [(var, precond_val)]
-                op_eff += [(var, eff_val)]
-
-        op_precond_list += [op_precond]
-        op_prevail_list += [op_prevail]
-        op_eff_list += [op_eff]
-
-    precond_prevail_list = []
-    for precond_sublist, prevail_sublist in zip(op_precond_list, op_prevail_list):
-        if not prevail_sublist:
-            precond_prevail_list.append(precond_sublist)
-        else:
-            precond_prevail_combined = precond_sublist + prevail_sublist
-            precond_prevail_list.append(precond_prevail_combined)
+class FactTimeline:
+    """
+    Plan steps that produce and consume a fact, in plan order. Steps are only appended while the
+    plan is swept forward, so both lists stay sorted and can be searched with bisect.
+    """
+    def __init__(self, producer):
+        self.producers = [producer]
+        self.consumers = []
 
-    return list(zip(precond_prevail_list, op_eff_list)), op_prevail_list
-    
-def get_prevail_link(prevail_link):
-    producers_list, fact , consumer = prevail_link
-    producers_list.sort()
-  
-    last_producer_for_consumer = max(filter(lambda x: x < consumer, producers_list))
-   
-    return (last_producer_for_consumer, fact, consumer)
+    def add_producer(self, step):
+        self.producers.append(step)
 
-# TODO: make this code more readable    
-def extract_causal_links(task, plan_operators):
+    def add_consumer(self, step):
+        self.consumers.append(step)
 
-    # Obtain the values of the initial state of the form (var,val)
-    list_causal_links = [[[0], (var, task.init.values[var]), []] for var in range(len(task.init.values))]
+    def last_producer_before(self, step):
+        """
+        Returns the last step before step that produces the fact, or None if there is none.
+        """
+        pos = bisect_left(self.producers, step)
+        return self.producers[pos - 1] if pos > 0 else None
 
-    list_causal_links_prevail =[]
+def get_step_conditions(op):
+    """
+    Returns the facts consumed by a plan step (preconditions of the pre_post followed by the
+    prevail conditions) and the set of its prevail conditions.
+    """
+    prevail = [(var, val) for var, val in op.prevail]
+    return [(var, pre) for var, pre, _, _ in op.pre_post] + prevail, set(prevail)
 
-    list_var_pre_post, op_prevail_list = get_var_pre_post_list(plan_operators)
-    
-    for i in range(len(list_var_pre_post)):
-        list_precond = list_var_pre_post[i][0]
-        list_effects = list_var_pre_post[i][1]
-        for j in range(len(list_precond)):
-            fact= list_precond[j]
-            for k in range(len(list_causal_links)):
-                causal_link_temp = list_causal_links[k]           
-                if causal_link_temp[1] == fact or (causal_link_temp[1][1] == -fact[1] and causal_link_temp[1][0] == fact[0]):
-                    if fact not in op_prevail_list[i]:
-                        list_causal_links[k][2].append(i+1)
-                    else:
-                        # Analyze if the producer its ok, because I always assume that its the first
-                        causal_link_prevail = (list_causal_links[k][0],fact,i+1)
-                        list_causal_links_prevail.append(causal_link_prevail)
-    
-        for l in range(len(list_effects)):
-            fact= list_effects[l]
-            exist=False
-            for k in range(len(list_causal_links)):
-                causal_link_temp=list_causal_links[k]
-                if causal_link_temp[1] == fact:
-                    exist=True
-                    list_causal_links[k][0].append(i+1)
-                    break;
-            if exist == False:
-                list_causal_links.append([[i+1],fact,[]])
-
-    list_causal_links_prevail = [get_prevail_link(prevail_link) for prevail_link in list_causal_links_prevail]
+def extract_causal_links(task, plan_operators):
+    """
+    Extracts the causal links [(producer, (var, val), consumer),...] and the prevail links of a plan
+    in a single forward sweep. Each fact keeps its producers and consumers in an index so every
+    condition and effect of a step is resolved with one lookup instead of scanning all the links.
+    Producer 0 is the initial state and consumer -1 means that the fact is never consumed.
+    """
+
+    # For each produced fact (var, val): its FactTimeline
+    fact_links = {}
+    # Facts in the order in which they are produced for the first time, the initial state comes first
+    produced_facts = []
+    for var, val in enumerate(task.init.values):
+        fact_links[(var, val)] = FactTimeline(0)
+        produced_facts.append((var, val))
+
+    list_causal_links_prevail = []
+
+    for step, op in enumerate(plan_operators, start=1):
+        # Skip actions neither consume nor produce facts
+        if op is None:
+            continue
+        conditions, prevail = get_step_conditions(op)
+        for fact in conditions:
+            var, val = fact
+            # A precondition with value -1 (any value) is linked to the value 1 of the variable
+            timeline = fact_links.get((var, abs(val)))
+            if timeline is None:
+                continue
+            if fact not in prevail:
+                timeline.add_consumer(step)
+            else:
+                list_causal_links_prevail.append((timeline.last_producer_before(step), fact, step))
+
+        for var, _, post, _ in op.pre_post:
+            timeline = fact_links.get((var, post))
+            if timeline is None:
+                fact_links[(var, post)] = FactTimeline(step)
+                produced_facts.append((var, post))
+            else:
+                timeline.add_producer(step)
 
     list_causal_links_final=[]
-    for i in range(len(list_causal_links)):
-        causal_link_temp = list_causal_links[i]
-        fact = task.variables.value_names[causal_link_temp[1][0]][causal_link_temp[1][1]]
-        producers = causal_link_temp[0]
-        consumers = causal_link_temp[2]
-        if "NegatedAtom" not in fact: 
+    for fact in produced_facts:
+        if "NegatedAtom" not in task.variables.value_names[fact[0]][fact[1]]:
+            producers, consumers = fact_links[fact].producers, fact_links[fact].consumers
             for j in range(len(producers)):
                 if j < len(consumers):
-                    list_causal_links_final.append((producers[j], causal_link_temp[1], consumers[j]))
+                    list_causal_links_final.append((producers[j], fact, consumers[j]))
                 else:
-                    list_causal_links_final.append((producers[j], causal_link_temp[1], -1))
-    
+                    list_causal_links_final.append((producers[j], fact, -1))
+
     list_prevail_links_final=[]
-    for i in range(len(list_causal_links_prevail)):
-        causal_link_prevail = list_causal_links_prevail[i]
-        fact = task.variables.value_names[causal_link_prevail[1][0]][causal_link_prevail[1][1]]
-        producer = causal_link_prevail[0]
-        consumer = causal_link_prevail[2]
-        if "NegatedAtom" not in fact: 
-            list_prevail_links_final.append((producer, causal_link_prevail[1], consumer))
-    
+    for (producer, fact, consumer) in list_causal_links_prevail:
+        if "NegatedAtom" not in task.variables.value_names[fact[0]][fact[1]]:
+            list_prevail_links_final.append((producer, fact, consumer))
+
     return list_causal_links_final, list_prevail_links_final
 
 
@@ -186,37 +174,89 @@ def list_cl_to_dict(list_cl, is_key_producer = True):
   
     return dict_cl
 
-def exist_in_sas_plan(causal_link_temp_renamed, task, list_causal_links_sas_plan):
-    for causal_link_temp in list_causal_links_sas_plan:
-        fact_sas_plan = (causal_link_temp[0],task.variables.value_names[causal_link_temp[1][0]][causal_link_temp[1][1]], causal_link_temp[2])
-        if fact_sas_plan == causal_link_temp_renamed:
-            return True
-    return False
-
-def causal_chain(elements,ordered_dict, element, list_temp):
-    for val in elements:
-        if val not in list_temp:
-            list_temp.append(val)
-            list_temp2 = ordered_dict.get(val,[])
-            elements2 = list(set([valor[0] for valor in list_temp2]))
-            causal_chain(elements2,ordered_dict, element, list_temp)
-    return list_temp
-    
-def causal_chains(list_cl_plan_ae, task, list_cl_plan, ordered_dict):
+def causal_chain(action, ordered_dict, ancestors):
+    """
+    Returns the actions (and the initial state 0) that action depends on through at least one causal link of
+    ordered_dict (consumer: [(producer, var_value)]) as a bitset where bit i is set for action i.
+    A step may consume a fact that it or a later step produces, so the links can form cycles. The strongly
+    connected components of the links are found with Tarjan's algorithm and all actions of a component share
+    their bitset, which is memoized in ancestors, so chains sharing a suffix are only computed once.
+    """
+    if action in ancestors:
+        return ancestors[action]
+
+    def get_producers(consumer):
+        return {producer for producer, _ in ordered_dict.get(consumer, [])}
+
+    # Tarjan's algorithm with an explicit stack of (action, its producers not visited yet)
+    order = {action: 0}
+    lowlink = {action: 0}
+    component_stack = [action]
+    on_component_stack = {action}
+    stack = [(action, iter(get_producers(action)))]
+    while stack:
+        current, pending = stack[-1]
+        for producer in pending:
+            if producer in ancestors:
+                continue
+            if producer not in order:
+                order[producer] = lowlink[producer] = len(order)
+                component_stack.append(producer)
+                on_component_stack.add(producer)
+                stack.append((producer, iter(get_producers(producer))))
+                break
+            if producer in on_component_stack:
+                lowlink[current] = min(lowlink[current], order[producer])
+        else:
+            stack.pop()
+            if stack:
+                parent = stack[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[current])
+            if lowlink[current] == order[current]:
+                component = []
+                while not component or component[-1] != current:
+                    component.append(component_stack.pop())
+                    on_component_stack.remove(component[-1])
+                members = set(component)
+                members_bits = sum(1 << member for member in component)
+                bits = 0
+                for member in component:
+                    for producer in get_producers(member):
+                        if producer in members:
+                            # Actions of a cycle depend on every action of the cycle, including themselves
+                            bits |= members_bits
+                        else:
+                            bits |= (1 << producer) | ancestors[producer]
+                for member in component:
+                    ancestors[member] = bits
+    return ancestors[action]
+
+def bitset_to_list(bits):
+    """
+    Returns the positions of the bits set in bits in increasing order.
+    """
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return positions
+
+def causal_chains(list_cl_plan_ae, list_cl_plan, ordered_dict):
     causal_chain_list = []
+    # Causal links are compared as (producer, (var, val), consumer) tuples, the fact names are only rendered when printed
+    set_cl_plan = set(list_cl_plan)
+    # action: bitset of the actions it depends on in the unjustified plan
+    ancestors = {}
     for causal_link_temp in list_cl_plan_ae:
-        causal_link_temp_renamed = (causal_link_temp[0], task.variables.value_names[causal_link_temp[1][0]][causal_link_temp[1][1]], causal_link_temp[2])
-        is_in_sas_plan = exist_in_sas_plan(causal_link_temp_renamed, task,list_cl_plan)
         # Identify the causal links of the justified plan that are not in the unjustified plan to find the casual chains
-        if  is_in_sas_plan == False and causal_link_temp[2]!=-1:  
+        if causal_link_temp not in set_cl_plan and causal_link_temp[2]!=-1:
             for causal_link_dict in ordered_dict[causal_link_temp[2]]:
-                fact_renamed = task.variables.value_names[causal_link_dict[1][0]][causal_link_dict[1][1]]
-                if fact_renamed== causal_link_temp_renamed[1]:
-                    list_temp = ordered_dict.get(causal_link_dict[0],[])
-                    elements = list(set([value[0] for value in list_temp]))
-                    causal_chain_temp= [causal_link_dict[0]]
-                    causal_chain_temp.extend(causal_chain(elements,ordered_dict,causal_link_temp_renamed[0],[]))
-                    causal_chain_list.append((causal_link_temp,sorted(causal_chain_temp))) 
+                if causal_link_dict[1] == causal_link_temp[1]:
+                    producer = causal_link_dict[0]
+                    # The producer appears twice if it depends on itself
+                    chain = sorted([producer] + bitset_to_list(causal_chain(producer, ordered_dict, ancestors)))
+                    causal_chain_list.append((causal_link_temp, chain))
     return causal_chain_list 
 
 def pos_redundant_actions(sas_plan_ae):
@@ -248,10 +288,78 @@ def show_plan_ae(plan, plan_ae_cost, list_pos_redundant_actions):
             print(f"{i+1} {plan[i]}")
     print(f"; cost = {plan_ae_cost} (general cost)")
 
-def get_redundant_producer(action_number, fact, task, causal_chain_list):
-    for causal_link_and_chain in causal_chain_list:
-        if causal_link_and_chain[0][2]== action_number and fact == task.variables.value_names[causal_link_and_chain[0][1][0]][causal_link_and_chain[0][1][1]]:
-            return causal_link_and_chain[1][-1]
+class ExplanationIndex:
+    """
+    Causal links of a plan and of its justified plan (the AE plan with skip actions), together with the
+    causal chains between them, indexed once so that every explanation query is answered with
+    constant-time lookups by producer, by consumer or by (consumer, fact).
+    """
+    def __init__(self, task, plan, ae_plan, list_cl_plan, list_cl_ae_plan, list_cl_prevail_ae_plan, causal_chain_list):
+        self.task = task
+        self.plan = plan
+        self.ae_plan = ae_plan
+        self.list_cl_plan = list_cl_plan
+        self.list_cl_ae_plan = list_cl_ae_plan
+        self.list_cl_prevail_ae_plan = list_cl_prevail_ae_plan
+        self.causal_chain_list = causal_chain_list
+        self.list_pos_redundant_actions = pos_redundant_actions(ae_plan)
+        self.redundant_actions = set(self.list_pos_redundant_actions)
+        # object: [positions of the actions that use it]
+        self.object_positions = get_object_positions(plan)
+
+        # producer: [(consumer, var_value)] for the causal links of the unjustified plan
+        self.links_by_producer = list_cl_to_dict(list_cl_plan, True)
+        # consumer: [(producer, var_value)] for the causal links and prevail links of the justified plan
+        self.ae_links_by_consumer = list_cl_to_dict(list_cl_ae_plan, False)
+        self.prevail_links_by_consumer = list_cl_to_dict(list_cl_prevail_ae_plan, False)
+        # consumer: [(producer, var_value)] for the causal links of the justified plan that have a causal chain
+        self.chain_links_by_consumer = list_cl_to_dict([causal_link for causal_link, _ in causal_chain_list], False)
+        # (consumer, var_value): last action of the causal chain through which the consumer obtained the fact in the unjustified plan
+        self.redundant_producers = {}
+        for (_, var_value, consumer), chain in causal_chain_list:
+            self.redundant_producers.setdefault((consumer, var_value), chain[-1])
+
+    def is_redundant(self, action_number):
+        return action_number in self.redundant_actions
+
+    def get_consumers(self, producer):
+        return self.links_by_producer.get(producer, [])
+
+    def get_relevant_producers(self, consumer, action_number):
+        """
+        Producers of the facts needed by consumer in the justified plan. When the explained action
+        consumes facts through a causal chain, only the links with a causal chain are considered.
+        """
+        if action_number in self.chain_links_by_consumer:
+            return self.chain_links_by_consumer.get(consumer, [])
+        return self.ae_links_by_consumer.get(consumer, [])
+
+    def get_prevail_producers(self, consumer):
+        return self.prevail_links_by_consumer.get(consumer, [])
+
+    def get_redundant_producer(self, consumer, var_value):
+        return self.redundant_producers.get((consumer, var_value))
+
+def build_explanation_index(task, operator_name_to_index, plan, ae_plan, ordered):
+    """
+    Extracts the causal links of the plan and of the justified plan and the causal chains between them.
+    """
+    plan_operators = get_operators_from_plan(task.operators, plan, operator_name_to_index, ordered)
+    list_cl_plan, _ = extract_causal_links(task, plan_operators)
+
+    ae_plan_operators = get_operators_from_plan(task.operators, ae_plan, operator_name_to_index, ordered)
+    list_cl_ae_plan, list_cl_prevail_ae_plan = extract_causal_links(task, ae_plan_operators)
+
+    # Convert causal links of original plan into a dictionary where the keys represent the consumers and the values are lists of (producers, fact)
+    # to simplify the search for causal chains
+    dict_cl_plan_consumer_ordered = list_cl_to_dict(list_cl_plan, False)
+
+    # Obtain the causal chains
+    # The causal chains is formed by a list containing tuples, which are formed by the causal link of the justified plan and its causal chain
+    # of the unjustified plan
+    causal_chain_list = causal_chains(list_cl_ae_plan, list_cl_plan, dict_cl_plan_consumer_ordered)
+
+    return ExplanationIndex(task, plan, ae_plan, list_cl_plan, list_cl_ae_plan, list_cl_prevail_ae_plan, causal_chain_list)
 
 def get_relevant_causal_links(plan,relevant_action_causal_links, list_prevail_links, task):
     list_explanations = []
@@ -304,8 +412,73 @@ def get_justif_prevail_conditions(plan,list_prevail_links, task):
 
     return list_explanations
 
-def generating_explanations(plan, list_pos_redundant_actions, list_causal_links_sas_plan, list_causal_links_ae_sas_plan, task, causal_chain_list, list_links_prevail_ae_plan):
+def explain_action(index, action_number):
+    """
+    Returns the explanation of why the action at position action_number (starting at 1) of the plan is
+    Redundant or Relevant.
+    """
+    plan = index.plan
+    task = index.task
+    explanation_str = ""
+    explanation_str += f"\nAction #{action_number}: {plan[action_number-1]}\n"
+
+    if index.is_redundant(action_number):
+        consumers_list = index.get_consumers(action_number)
+        dict_temp = convert_to_dict_producer_fact(consumers_list)
+        explanation_str += "This Action is Redundant in the plan because it produces:"
+        for consumer, fact_list in dict_temp.items():
+            fact_list_renamed = [task.variables.value_names[fact[0]][fact[1]] for fact in fact_list]
+            facts_str = ""
+            if len(fact_list) == 1:
+                facts_str = fact_list_renamed[0]
+            else:
+                facts_str = ', '.join(fact_list_renamed[:-1]) + ' and ' + fact_list_renamed[-1]
+            if consumer == -1:
+                explanation_str += f"\n--> {facts_str} that is not consumed by any other action."
+            elif index.is_redundant(consumer):
+                explanation_str += f"\n--> {facts_str} which is consumed by the Action {consumer} {plan[consumer-1]} also Redundant."
+            else:
+                relevant_causal_links = get_relevant_causal_links(plan, index.get_relevant_producers(consumer, action_number), index.get_prevail_producers(consumer), task)
+                rel_expl_str = ""
+                if len(relevant_causal_links) == 1:
+                    rel_expl_str = relevant_causal_links[0]
+                else:
+                    rel_expl_str = '; '.join(relevant_causal_links[:-1]) + ' and ' + relevant_causal_links[-1]
+                explanation_str += f"\n--> {facts_str} which is consumed by the Action {consumer} {plan[consumer-1]} that is Relevant. Action {consumer} in the justified plan needs {rel_expl_str}."
+
+    else:
+        producers_list = index.get_relevant_producers(action_number, action_number)
+        explanation_str += "In the justified plan, in order for this Relevant Action to be executed, it requires the fact:"
+        list_fact_produced_initial_state = []
+        for element in producers_list:
+            producer, (var_index, val_index) = element
+            fact = task.variables.value_names[var_index][val_index]
+            if producer == 0:
+                list_fact_produced_initial_state.append(fact)
+            else:
+                redundant_action = index.get_redundant_producer(action_number, (var_index, val_index))
+                if redundant_action is None:
+                    explanation_str += f"\n--> {fact} as a precondition which is obtained through the effects produced by the Relevant Action {producer} {plan[producer-1]}."
+                else:
+                    explanation_str += f"\n--> {fact} as a precondition which is obtained through the effects produced by the Relevant Action {producer} {plan[producer-1]}. This fact, in the unjustified plan, Action {action_number} {plan[action_number-1]} obtained it through the Redundant Action {redundant_action} {plan[redundant_action-1]}."
+        
+        facts_str = ""
+        if len(list_fact_produced_initial_state) > 1:
+            facts_str = ", ".join(list_fact_produced_initial_state[:-1]) + " and " + list_fact_produced_initial_state[-1] + " as preconditions which are obtained from the initial state."
+        if len(list_fact_produced_initial_state) == 1:
+            facts_str = list_fact_produced_initial_state[0] + " as a precondition which is obtained from the initial state."
+        
+        if len(facts_str) > 0:
+            explanation_str += f"\n--> {facts_str}"
     
+        list_prevail_justif = get_justif_prevail_conditions(plan, index.get_prevail_producers(action_number), task)
+        for prevail_justif in list_prevail_justif:
+            explanation_str += f"\n--> {prevail_justif}"
+
+    return explanation_str
+
+def generating_explanations(index):
+    plan = index.plan
     explanations_dict = {}
 
     while True:
@@ -323,74 +496,7 @@ def generating_explanations(plan, list_pos_redundant_actions, list_causal_links_
                     if action_number in explanations_dict:
                         print(explanations_dict[action_number])               
                     else:
-                        explanation_str = ""
-                        explanation_str += f"\nAction #{action_number}: {plan[action_number-1]}\n"
-                        
-                        relevant_action_causal_links_dict = list_cl_to_dict([tuple[0] for tuple in causal_chain_list], False)
-                        if len(relevant_action_causal_links_dict) == 0 or action_number not in relevant_action_causal_links_dict:
-                            relevant_action_causal_links_dict = list_cl_to_dict(list_causal_links_ae_sas_plan, False)
-                        redundant_action_causal_links_dict = list_cl_to_dict(list_causal_links_sas_plan, True)
-
-                        prevail_links_dict = list_cl_to_dict(list_links_prevail_ae_plan, False)
-
-                        if action_number in list_pos_redundant_actions:
-                            consumers_list = redundant_action_causal_links_dict.get(action_number, [])
-                            dict_temp = convert_to_dict_producer_fact(consumers_list)
-                            explanation_str += "This Action is Redundant in the plan because it produces:"
-                            for consumer, fact_list in dict_temp.items():
-                                fact_list_renamed = [task.variables.value_names[fact[0]][fact[1]] for fact in fact_list]
-                                facts_str = ""
-                                if len(fact_list) == 1:
-                                    facts_str = fact_list_renamed[0]
-                                else:
-                                    facts_str = ', '.join(fact_list_renamed[:-1]) + ' and ' + fact_list_renamed[-1]
-                                if consumer == -1:
-                                    explanation_str += f"\n--> {facts_str} that is not consumed by any other action."
-                                elif consumer in list_pos_redundant_actions:
-                                    explanation_str += f"\n--> {facts_str} which is consumed by the Action {consumer} {plan[consumer-1]} also Redundant."
-                                else:
-                                    if consumer in prevail_links_dict:                                        
-                                        relevant_causal_links = get_relevant_causal_links(plan, relevant_action_causal_links_dict[consumer], prevail_links_dict[consumer], task)
-                                    else:
-                                        relevant_causal_links = get_relevant_causal_links(plan, relevant_action_causal_links_dict[consumer], [], task)
-                                    rel_expl_str = ""
-                                    if len(relevant_causal_links) == 1:
-                                        rel_expl_str = relevant_causal_links[0]
-                                    else:
-                                        rel_expl_str = '; '.join(relevant_causal_links[:-1]) + ' and ' + relevant_causal_links[-1]
-                                    explanation_str += f"\n--> {facts_str} which is consumed by the Action {consumer} {plan[consumer-1]} that is Relevant. Action {consumer} in the justified plan needs {rel_expl_str}."
-
-                        else:
-                            producers_list = relevant_action_causal_links_dict.get(action_number, [])
-                            explanation_str += "In the justified plan, in order for this Relevant Action to be executed, it requires the fact:"
-                            list_fact_produced_initial_state = []
-                            for element in producers_list:
-                                producer, (var_index, val_index) = element
-                                fact = task.variables.value_names[var_index][val_index]
-                                if producer == 0:
-                                    list_fact_produced_initial_state.append(fact)
-                                else:
-                                    redundant_action = get_redundant_producer(action_number, fact, task, causal_chain_list)
-                                    if redundant_action is None:
-                                        explanation_str += f"\n--> {fact} as a precondition which is obtained through the effects produced by the Relevant Action {producer} {plan[producer-1]}."
-                                    else:
-                                        explanation_str += f"\n--> {fact} as a precondition which is obtained through the effects produced by the Relevant Action {producer} {plan[producer-1]}. This fact, in the unjustified plan, Action {action_number} {plan[action_number-1]} obtained it through the Redundant Action {redundant_action} {plan[redundant_action-1]}."
-                            
-                            facts_str = ""
-                            if len(list_fact_produced_initial_state) > 1:
-                                facts_str = ", ".join(list_fact_produced_initial_state[:-1]) + " and " + list_fact_produced_initial_state[-1] + " as preconditions which are obtained from the initial state."
-                            if len(list_fact_produced_initial_state) == 1:
-                                facts_str = list_fact_produced_initial_state[0] + " as a precondition which is obtained from the initial state."
-                            
-                            if len(facts_str) > 0:
-                                explanation_str += f"\n--> {facts_str}"
-                        
-                            if action_number in prevail_links_dict: 
-                                list_prevail_justif = get_justif_prevail_conditions(plan, prevail_links_dict[action_number], task)
-                                if len(list_prevail_justif)>0:
-                                    for prevail_justif in list_prevail_justif:
-                                        explanation_str += f"\n--> {prevail_justif}"
-
+                        explanation_str = explain_action(index, action_number)
                         explanations_dict[action_number] = explanation_str
                         print(explanation_str)
                 else:
@@ -413,7 +519,49 @@ def obtaining_objects_from_facts(init_values_list,task):
                         list_objects.append(object_temp)
     return list_objects
 
-def identifying_redundant_objects(list_actions_plan, list_pos_redundant_actions):
+def get_action_objects(action):
+    """
+    Returns the objects of a plan action in the form '(name obj1 obj2 ...)'.
+    """
+    begin = action.find(' ')
+    return action[begin + 1:-1].split() if begin != -1 else []
+
+def get_object_positions(list_actions_plan):
+    """
+    Returns an inverted index of the plan: object: [positions (starting at 1) of the actions that use it].
+    Objects are kept in the order in which they first appear in the plan.
+    """
+    object_positions = defaultdict(list)
+    for i, action in enumerate(list_actions_plan):
+        # An object that is repeated in the arguments of an action is one use of the object
+        for object_temp in dict.fromkeys(get_action_objects(action)):
+            object_positions[object_temp].append(i+1)
+    return object_positions
+
+def get_object_usage(object_positions):
+    """
+    Returns the number of actions of the plan that use each object.
+    """
+    return {object_temp: len(positions) for object_temp, positions in object_positions.items()}
+
+def get_irrelevant_objects(object_positions, redundant_actions):
+    """
+    Returns the objects of the plan that are not used by any Relevant Action.
+    """
+    # Objects present in relevant actions are considered relevant, regardless of their presence in the goal state; otherwise, they are not considered relevant.
+    return [object_temp for object_temp, positions in object_positions.items() if not set(positions) - redundant_actions]
+
+def irrelevant_objects_explanation(list_irrelevant_objects):
+    if len(list_irrelevant_objects) == 0:
+        return 'There are no irrelevant objects.'
+    elif len(list_irrelevant_objects) > 1:
+        objects_str = ", ".join(list_irrelevant_objects[:-1]) + " and " + list_irrelevant_objects[-1]
+        return f"--> Objects {objects_str} are irrelevant because they are not used in any Relevant Action."
+    else:
+        objects_str = list_irrelevant_objects[0] 
+        return f"--> Object {objects_str} is irrelevant because it is not used in any Relevant Action."
+
+def identifying_redundant_objects(index):
     
     while True:
         show_irrelevant_objects = input("\nWould you like to obtain redundant objects? (Yes/No): ").lower()
@@ -421,26 +569,9 @@ def identifying_redundant_objects(list_actions_plan, list_pos_redundant_actions)
             print("Obtaining redundant objects finished.")
             break
         elif show_irrelevant_objects == "yes":
-            list_all_objects=[]
-            list_relevant_objects = []
-            # Objects present in relevant actions are considered relevant, regardless of their presence in the goal state; otherwise, they are not considered relevant.
-            for i, action in enumerate(list_actions_plan):
-                objects = action[action.find(' ') + 1:-1].split()
-                list_all_objects = list(set(list_all_objects) | set(objects))  
-                if (i+1) not in list_pos_redundant_actions:
-                    list_relevant_objects = list(set(list_relevant_objects) | set(objects)) 
-                        
-            list_irrelevant_objects = list(set(list_all_objects) - set(list_relevant_objects))
-                        
+            list_irrelevant_objects = get_irrelevant_objects(index.object_positions, index.redundant_actions)
             # Printing irrelevant objects, in case they exist (those not found in relevant actions) 
-            if len(list_irrelevant_objects) == 0:
-                print('There are no irrelevant objects.')   
-            elif len(list_irrelevant_objects) > 1:
-                    objects_str = ", ".join(list_irrelevant_objects[:-1]) + " and " + list_irrelevant_objects[-1]
-                    print(f"--> Objects {objects_str} are irrelevant because they are not used in any Relevant Action.")
-            else:
-                    objects_str = list_irrelevant_objects[0] 
-                    print(f"--> Object {objects_str} is irrelevant because it is not used in any Relevant Action.")
+            print(irrelevant_objects_explanation(list_irrelevant_objects))
             break
         else:
             print("You have entered an invalid option.")
@@ -509,6 +640,31 @@ def identifying_redundant_objects_OLD(task, list_actions_plan, list_pos_redundan
         else:
             print("You have entered an invalid option.")
 
+def causal_chain_explanation(plan, causal_link, chain, task):
+    """
+    Explains how the fact of a causal link of the perfectly justified plan is obtained in the
+    unjustified plan through the given causal chain of actions.
+    """
+    fact_instantiated = task.variables.value_names[causal_link[1][0]][causal_link[1][1]]
+    explanation_str = f"--> Fact {fact_instantiated} is produced by the "
+    if causal_link[0] == 0:
+        explanation_str += "initial state"
+    else:
+        explanation_str += f"Action {causal_link[0]} {plan[causal_link[0]-1]} "
+    explanation_str += f" and is consumed by Action {causal_link[2]} {plan[causal_link[2]-1]} in the perfectly justified plan. In the unjustified plan, this fact would be obtained through the following causal chain of actions:"
+    producer = causal_link[0]
+
+    causal_chain_str = ""
+    found = False
+    for action in chain:
+        if action == producer:
+            found = True
+        if found and action!=0:
+            temp =  f" {plan[action-1]}" 
+            causal_chain_str += " " + str(action) + temp + ","
+    explanation_str += causal_chain_str.rstrip(",")
+    return explanation_str
+
 def showing_causal_chains(plan, causal_chain_list, task):
     while True:
         show_causal_chains = input("\nWould you like to obtain the causal chains present in the unjustified plan? (Yes/No): ").lower()
@@ -517,115 +673,283 @@ def showing_causal_chains(plan, causal_chain_list, task):
             break
         elif show_causal_chains == "yes":
             if len(causal_chain_list) > 0:
-                for causal_link_chain in causal_chain_list:
-                    explanation_str=""
-                    causal_link = causal_link_chain[0]
-                    causal_chain = causal_link_chain[1]
-                    fact_instantiated = task.variables.value_names[causal_link[1][0]][causal_link[1][1]]
-                    explanation_str = f"--> Fact {fact_instantiated} is produced by the "
-                    if causal_link[0] == 0:
-                        explanation_str += "initial state"
-                    else:
-                        explanation_str += f"Action {causal_link[0]} {plan[causal_link[0]-1]} "
-                    explanation_str += f" and is consumed by Action {causal_link[2]} {plan[causal_link[2]-1]} in the perfectly justified plan. In the unjustified plan, this fact would be obtained through the following causal chain of actions:"
-                    producer = causal_link[0]
-
-                    causal_chain_str = ""
-                    found = False
-                    for action in causal_chain:
-                        if action == producer:
-                            found = True
-                        if found and action!=0:
-                            temp =  f" {plan[action-1]}" 
-                            causal_chain_str += " " + str(action) + temp + ","
-                    explanation_str += causal_chain_str.rstrip(",")
-                    print(explanation_str)
-                    
+                for causal_link, chain in causal_chain_list:
+                    print(causal_chain_explanation(plan, causal_link, chain, task))
             else:
-                print("There are no unnecessary or non-justified causal chains of actions because the Relevant Actions of the justified plan do not consume facts produced by Redundant Actions in the unjustified plan.")
+                print(NO_CAUSAL_CHAINS_STR)
             break
         else:
             print("You have entered an invalid option.")   
 
+def parse_action_numbers(value):
+    """
+    Parses the value of --explain: 'all' or a comma-separated list of action numbers.
+    """
+    if value.strip().lower() == EXPLAIN_ALL:
+        return EXPLAIN_ALL
+    try:
+        action_numbers = [int(action_number) for action_number in value.split(',') if action_number.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected '{EXPLAIN_ALL}' or a comma-separated list of action numbers, got '{value}'")
+    if not action_numbers or min(action_numbers) < 1:
+        raise argparse.ArgumentTypeError(f"action numbers must be positive integers, got '{value}'")
+    return action_numbers
+
+def plan_record(plan_file, ae_plan_file, plan, plan_cost, ae_plan, plan_ae_cost):
+    """
+    Returns the batch record describing a plan and its justified plan.
+    """
+    list_pos_redundant_actions = pos_redundant_actions(ae_plan)
+    return {"type": "plan", "plan": plan_file, "skip_plan": ae_plan_file, "length": len(plan), "cost": plan_cost,
+            "justified_cost": plan_ae_cost, "perfectly_justified": not list_pos_redundant_actions,
+            "redundant_actions": list_pos_redundant_actions}
+
+def explanation_records(index, explain=None, objects=False, chains=False):
+    """
+    Yields the batch records answering the questions selected with --explain, --objects and --chains.
+    """
+    plan = index.plan
+    if objects:
+        list_irrelevant_objects = get_irrelevant_objects(index.object_positions, index.redundant_actions)
+        yield {"type": "objects", "irrelevant_objects": list_irrelevant_objects,
+               "object_usage": get_object_usage(index.object_positions),
+               "explanation": irrelevant_objects_explanation(list_irrelevant_objects)}
+
+    if chains:
+        for causal_link, chain in index.causal_chain_list:
+            producer, (var, val), consumer = causal_link
+            yield {"type": "causal_chain", "producer": producer, "fact": index.task.variables.value_names[var][val],
+                   "consumer": consumer, "chain": chain,
+                   "explanation": causal_chain_explanation(plan, causal_link, chain, index.task)}
+
+    if explain is not None:
+        action_numbers = range(1, len(plan) + 1) if explain == EXPLAIN_ALL else explain
+        for action_number in action_numbers:
+            explanation_str = explain_action(index, action_number)
+            yield {"type": "explanation", "action": action_number, "name": plan[action_number-1],
+                   "redundant": index.is_redundant(action_number),
+                   "explanation": explanation_str.split("\n", 2)[-1]}
+
+def write_records(stream, records):
+    """
+    Writes the records as JSON Lines, one object per line.
+    """
+    for record in records:
+        stream.write(json.dumps(record) + "\n")
+
+class LRUCache:
+    """
+    Dictionary that keeps at most size entries, discarding the least recently used one.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+def file_key(path):
+    """
+    Identifies a file by its path, modification time and size, so a file that changes on disk
+    gets a new key without reading it.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+class ExplanationService:
+    """
+    Answers explanation queries keeping the parsed tasks and the explanation indexes of the last
+    queried plans in memory. Files are identified by file_key, so a file that changes on disk is
+    parsed again. The lock only guards the caches: files are parsed outside of it, so a request
+    that misses the cache does not block the others (two simultaneous misses may parse the same
+    files twice).
+    """
+    def __init__(self, cache_size):
+        # task key: (task, operator_name_to_index)
+        self.tasks = LRUCache(cache_size)
+        # (task key, plan key, skip plan key, ordered): (plan, plan_cost, ae_plan, plan_ae_cost, index)
+        self.plans = LRUCache(cache_size)
+        self.lock = threading.Lock()
+
+    def get_task(self, task_file, task_key):
+        with self.lock:
+            entry = self.tasks.get(task_key)
+        if entry is None:
+            entry = parse_task(task_file)
+            with self.lock:
+                self.tasks.put(task_key, entry)
+        return entry
+
+    def get_plan(self, task_file, plan_file, ae_plan_file, ordered):
+        task_key = file_key(task_file)
+        key = (task_key, file_key(plan_file), file_key(ae_plan_file), ordered)
+        with self.lock:
+            entry = self.plans.get(key)
+        if entry is None:
+            ae_plan, plan_ae_cost = parse_plan(ae_plan_file)
+            plan, plan_cost = parse_plan(plan_file)
+            index = None
+            if not is_perfectly_justified(ae_plan):
+                task, operator_name_to_index_map = self.get_task(task_file, task_key)
+                index = build_explanation_index(task, operator_name_to_index_map, plan, ae_plan, ordered)
+            entry = (plan, plan_cost, ae_plan, plan_ae_cost, index)
+            with self.lock:
+                self.plans.put(key, entry)
+        return entry
+
+    def answer(self, query):
+        """
+        Returns the batch records answering a query, a dict with the keys of the command line options:
+        task, plan, splan, subsequence, explain, objects and chains.
+        """
+        try:
+            task_file, plan_file, ae_plan_file = query['task'], query['plan'], query['splan']
+        except KeyError as missing:
+            raise ValueError(f"missing {missing} in the query")
+        explain = query.get('explain')
+        if isinstance(explain, (str, int)):
+            explain = parse_action_numbers(str(explain))
+        plan, plan_cost, ae_plan, plan_ae_cost, index = self.get_plan(task_file, plan_file, ae_plan_file, bool(query.get('subsequence', False)))
+        if explain not in (None, EXPLAIN_ALL) and (not explain or min(explain) < 1 or max(explain) > len(plan)):
+            raise ValueError(f"Invalid action numbers {explain}: the plan has {len(plan)} actions.")
+        records = [plan_record(plan_file, ae_plan_file, plan, plan_cost, ae_plan, plan_ae_cost)]
+        if index is not None:
+            records += explanation_records(index, explain, bool(query.get('objects', False)), bool(query.get('chains', False)))
+        return records
+
+class ExplanationRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST a JSON query to the service and receive the answers as JSON Lines.
+    """
+    def do_POST(self):
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            records = self.server.service.answer(query)
+        except (ValueError, TypeError, OSError, argparse.ArgumentTypeError) as error:
+            self.send_answer(400, [{"type": "error", "error": str(error)}])
+        except KeyError as error:
+            self.send_answer(400, [{"type": "error", "error": f"the plan contains an action that is not in the task: {error}"}])
+        except (AssertionError, SystemExit) as error:
+            # The task parser asserts the format of the file and exits on unsupported tasks
+            self.send_answer(400, [{"type": "error", "error": f"invalid task file: {error}"}])
+        except Exception as error:
+            # Any other failure is a bug, but the client still gets an answer
+            self.log_error("%s", repr(error))
+            self.send_answer(500, [{"type": "error", "error": repr(error)}])
+        else:
+            self.send_answer(200, records)
+
+    def send_answer(self, status, records):
+        body = "".join(json.dumps(record) + "\n" for record in records).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def create_server(host, port, cache_size):
+    server = ThreadingHTTPServer((host, port), ExplanationRequestHandler)
+    server.service = ExplanationService(cache_size)
+    return server
+
 def main():
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
     required_named = parser.add_argument_group('required named arguments')
-    required_named.add_argument('-t', '--task', help='Path to task file in SAS+ format.',type=str, required=True)
-    required_named.add_argument('-p', '--plan', help='Path to original plan file.', type=str, required=True)
-    required_named.add_argument('-s', '--splan', help='Path to skip plan file.', type=str, required=True)
+    required_named.add_argument('-t', '--task', help='Path to task file in SAS+ format.',type=str)
+    required_named.add_argument('-p', '--plan', help='Path to original plan file.', type=str)
+    required_named.add_argument('-s', '--splan', help='Path to skip plan file.', type=str)
     parser.add_argument('--subsequence', help='Compiled task must guarantee maintaining order of original actions', action='store_true', default=False)
+    parser.add_argument('--cache-task', help='Read the task from a binary cache next to it (<task>.cache), which is created if it does not exist', action='store_true', default=False)
+    batch = parser.add_argument_group('batch mode', 'Any of these options disables the interactive questions. The selected answers are written as JSON Lines.')
+    batch.add_argument('--explain', help="Explain the given actions: 'all' or a comma-separated list of action numbers, e.g. 3,17,42", type=parse_action_numbers, default=None)
+    batch.add_argument('--objects', help='Obtain the irrelevant objects of the plan', action='store_true', default=False)
+    batch.add_argument('--chains', help='Obtain the causal chains present in the unjustified plan', action='store_true', default=False)
+    batch.add_argument('-o', '--output', help="File where the JSON Lines are written ('-' for stdout)", type=str, default='-')
+    service = parser.add_argument_group('service mode', 'Keep the parsed tasks in memory and answer explanation queries over HTTP. The required named arguments are not used.\n'
+                                        'POST a JSON object with the keys task, plan, splan, subsequence, explain, objects and chains; the answer is the batch mode JSON Lines.')
+    service.add_argument('--serve', help='Port on which the service listens', type=int, default=None)
+    service.add_argument('--host', help='Address on which the service listens', type=str, default='127.0.0.1')
+    service.add_argument('--cache-size', help='Number of tasks and plans kept in memory', type=int, default=8)
     options = parser.parse_args()
 
+    if options.serve is not None:
+        server = create_server(options.host, options.serve, options.cache_size)
+        print(f"Serving explanations on http://{options.host}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
     # Check files required as parameters
     if options.task == None or options.plan == None or options.splan == None :
         parser.print_help()
         sys.exit(2)
 
-    print(f"\nParsing AE plan")
-    ae_plan, plan_ae_cost = parse_plan(options.splan)
-    print(ae_plan)
-
-  
-    if (is_perfectly_justified(ae_plan)):
-        print("\nThe original plan is perfectly justified.")
-    else:
-        print("\nThe original plan is not perfectly justified.")
-
-        #Extract causal links from the input plan 
-        #print(f"\nParsing original task")
-        task, operator_name_to_index_map = parse_task(options.task)
-        # print(operator_name_to_index_map)
-        # task.dump()
-
-        print(f"\nParsing original plan")
-        plan, plan_cost = parse_plan(options.plan)
-        print(plan)
-
-        print(f"\nExtracting causal links from original plan")
-        plan_operators = get_operators_from_plan(task.operators, plan, operator_name_to_index_map, options.subsequence)
-        list_cl_plan, list_cl_prevail_plan = extract_causal_links(task, plan_operators)
-        print(list_cl_plan)
-        #print(list_cl_prevail_plan)
-        #pretty_print_causal_links (list_cl_plan, plan_operators, task)        
-
-        print(f"\nExtracting causal links from the justified plan (with skip actions) using original task")   
-        # # print(f"\nOp name index orig task")
-        # # print(operator_name_to_index_map)     
-        # # print(f"\nOp name index ae task")
-        # # print(operator_name_to_index_map_ae)
-        ae_plan_operators = get_operators_from_plan(task.operators, ae_plan, operator_name_to_index_map, options.subsequence)      
-        list_cl_ae_plan, list_cl_prevail_ae_plan  = extract_causal_links(task, ae_plan_operators)
-        print(list_cl_ae_plan)
-        #print(list_cl_prevail_ae_plan)
-        #pretty_print_causal_links (list_cl_ae_plan, ae_plan_operators, task)
-
-        # Convert causal links of original plan into a dictionary where the keys represent the consumers and the values are lists of (producers, fact)
-        # to simplify the search for causal chains
-        dict_cl_plan_consumer_ordered = list_cl_to_dict(list_cl_plan, False)
-        #print("\nOrdered dictionary (consumer key) causal links original plan\n", dict_cl_plan_consumer_ordered)
-
-        # Obtain the causal chains
-        # The causal chains is formed by a list containing tuples, which are formed by the causal link of the justified plan and its causal chain
-        # of the unjustified plan
-        print(f"\nExtracting causal chains")
-        # causal_chain_list = causal_chains(list_cl_ae_plan,ae_task,task, list_cl_plan,dict_cl_plan_consumer_ordered )
-        causal_chain_list = causal_chains(list_cl_ae_plan, task, list_cl_plan, dict_cl_plan_consumer_ordered)        
-        print(causal_chain_list) 
-
-        list_pos_redundant_actions = pos_redundant_actions(ae_plan)
-        print(f"\nPositions of the redundant actions in the plan: {list_pos_redundant_actions}")
-
-        # Print plan with action elimination
-        show_plan_ae(plan, plan_ae_cost, list_pos_redundant_actions)
-
-        # # Show irrelevant objects, which are those that are not needed in the perfectly justified plan
-        identifying_redundant_objects(plan, list_pos_redundant_actions)
-
-        # Show causal chains
-        showing_causal_chains(plan, causal_chain_list, task)
-
-        # # Generating explanations for actions
-        generating_explanations(plan, list_pos_redundant_actions, list_cl_plan, list_cl_ae_plan, task, causal_chain_list, list_cl_prevail_ae_plan)
+    is_batch = options.explain is not None or options.objects or options.chains
+    index = None
+    # In batch mode the progress messages must not be mixed with the JSON Lines written to stdout
+    with redirect_stdout(sys.stderr) if is_batch and options.output == '-' else nullcontext():
+        print(f"\nParsing AE plan")
+        ae_plan, plan_ae_cost = parse_plan(options.splan)
+        print(ae_plan)
+
+        if (is_perfectly_justified(ae_plan)):
+            print("\nThe original plan is perfectly justified.")
+            plan, plan_cost = parse_plan(options.plan)
+        else:
+            print("\nThe original plan is not perfectly justified.")
+            task, operator_name_to_index_map = parse_task(options.task, use_cache=options.cache_task)
+
+            print(f"\nParsing original plan")
+            plan, plan_cost = parse_plan(options.plan)
+            print(plan)
+
+            index = build_explanation_index(task, operator_name_to_index_map, plan, ae_plan, options.subsequence)
+
+            print(f"\nExtracting causal links from original plan")
+            print(index.list_cl_plan)
+            print(f"\nExtracting causal links from the justified plan (with skip actions) using original task")
+            print(index.list_cl_ae_plan)
+            print(f"\nExtracting causal chains")
+            print(index.causal_chain_list)
+            print(f"\nPositions of the redundant actions in the plan: {index.list_pos_redundant_actions}")
+
+    if is_batch:
+        if options.explain not in (None, EXPLAIN_ALL) and max(options.explain) > len(plan):
+            sys.exit(f"Invalid action number {max(options.explain)}: the plan has {len(plan)} actions.")
+        records = [plan_record(options.plan, options.splan, plan, plan_cost, ae_plan, plan_ae_cost)]
+        if index is not None:
+            records += explanation_records(index, options.explain, options.objects, options.chains)
+        with open(options.output, 'w') if options.output != '-' else nullcontext(sys.stdout) as stream:
+            write_records(stream, records)
+        return
+
+    if index is None:
+        return
+
+    # Print plan with action elimination
+    show_plan_ae(plan, plan_ae_cost, index.list_pos_redundant_actions)
+
+    # # Show irrelevant objects, which are those that are not needed in the perfectly justified plan
+    identifying_redundant_objects(index)
+
+    # Show causal chains
+    showing_causal_chains(plan, index.causal_chain_list, task)
+
+    # # Generating explanations for actions
+    generating_explanations(index)
 
 if __name__ == '__main__':
     main()
@@ -2,6 +2,7 @@
 
 
 from collections import defaultdict
+import itertools
 
 import build_model
 import options
@@ -150,6 +151,99 @@ def instantiate(task, model):
             sorted(instantiated_axioms), reachable_action_parameters)
 
 
+class FluentPredicateFacts:
+    """Contains every atom of a fluent predicate, which is used to
+    instantiate actions before their reachable atoms are known."""
+    def __init__(self, fluent_predicates):
+        self.fluent_predicates = fluent_predicates
+
+    def __contains__(self, atom):
+        return atom.predicate in self.fluent_predicates
+
+def instantiate_plan_actions(task, plan, init_facts, init_assignments,
+                             fluent_facts, type_to_objects):
+    """Instantiate the actions of the plan (names such as "(move a b)").
+    Normalization may split an action into several ones with the same
+    name or add parameters (e.g. for existential preconditions), so
+    every action with the name of a plan action is instantiated with
+    every value of its additional parameters.
+    Returns the instantiated actions and their parameters by action."""
+    actions_by_name = defaultdict(list)
+    for action in task.actions:
+        actions_by_name[action.name].append(action)
+
+    objects_of_type = {type_name: set(objects)
+                       for type_name, objects in type_to_objects.items()}
+    instantiated_actions = []
+    action_parameters = defaultdict(list)
+    for plan_action in sorted(set(plan)):
+        name, *args = plan_action.strip("()").lower().split()
+        if name not in actions_by_name:
+            raise SystemExit("Error: unknown action in plan: %s" % plan_action)
+        found = False
+        for action in actions_by_name[name]:
+            external_parameters = action.parameters[:action.num_external_parameters]
+            if len(args) != len(external_parameters) or any(
+                    arg not in objects_of_type.get(par.type_name, ())
+                    for par, arg in zip(external_parameters, args)):
+                continue
+            extra_parameters = action.parameters[action.num_external_parameters:]
+            for extra_args in itertools.product(*[
+                    type_to_objects[par.type_name] for par in extra_parameters]):
+                inst_parameters = tuple(args) + extra_args
+                variable_mapping = {par.name: arg for par, arg in
+                                    zip(action.parameters, inst_parameters)}
+                inst_action = action.instantiate(
+                    variable_mapping, init_facts, init_assignments,
+                    fluent_facts, type_to_objects,
+                    task.use_min_cost_metric)
+                if inst_action:
+                    instantiated_actions.append(inst_action)
+                    action_parameters[action].append(inst_parameters)
+                    found = True
+        if not found:
+            raise SystemExit("Error: plan action cannot be applied in any "
+                             "state of the task: %s" % plan_action)
+    return instantiated_actions, action_parameters
+
+def explore_plan(task, plan):
+    """Instantiate only the actions of a plan instead of all reachable
+    actions. The actions are instantiated twice: first treating every
+    atom of a fluent predicate as fluent, to find the atoms that the
+    actions can add, and then with the atoms of the initial state and
+    those atoms as fluent facts.
+    Returns the same as explore, with all atoms that the plan actions
+    can reach as fluent facts."""
+    if task.axioms:
+        raise SystemExit("Error: translating only the actions of a plan "
+                         "is not supported for tasks with axioms")
+    fluent_predicates = {effect.literal.predicate
+                         for action in task.actions
+                         for effect in action.effects}
+    init_facts = set()
+    init_assignments = {}
+    for element in task.init:
+        if isinstance(element, pddl.Assign):
+            init_assignments[element.fluent] = element.expression
+        else:
+            init_facts.add(element)
+    type_to_objects = get_objects_by_type(task.objects, task.types)
+
+    actions, _ = instantiate_plan_actions(
+        task, plan, init_facts, init_assignments,
+        FluentPredicateFacts(fluent_predicates), type_to_objects)
+    fluent_facts = {atom for atom in init_facts
+                    if atom.predicate in fluent_predicates}
+    for action in actions:
+        fluent_facts.update(atom for _, atom in action.add_effects)
+
+    actions, action_parameters = instantiate_plan_actions(
+        task, plan, init_facts, init_assignments, fluent_facts,
+        type_to_objects)
+    goal = instantiate_goal(task.goal, init_facts, fluent_facts)
+    return (True, fluent_facts, actions, goal, [], action_parameters)
+
+
 def explore(task):
     prog = pddl_to_prolog.translate(task)
     model = build_model.compute_model(prog)
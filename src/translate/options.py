@@ -27,7 +27,14 @@ def parse_args():
         "too many candidates.")
     argparser.add_argument(
         "--sas-file", default="output.sas",
-        help="path to the SAS output file (default: %(default)s)")
+        help="path to the SAS output file, compressed with gzip if it ends "
+        "with .gz (default: %(default)s)")
+    argparser.add_argument(
+        "--plan", default=None,
+        help="only translate the actions of this plan and the facts they "
+        "reach, e.g. to eliminate the redundant actions of the plan. "
+        "Variables that do not influence the goal are kept, so that all "
+        "actions of the plan are in the translated task")
     argparser.add_argument(
         "--invariant-generation-max-time", default=300, type=int,
         help="max time for invariant generation (default: %(default)ds)")
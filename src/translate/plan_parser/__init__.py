@@ -1 +1,2 @@
-from .plan_file import parse_plan
+from .plan_file import parse_plan, write_plan
+from .plan_step import PlanStep
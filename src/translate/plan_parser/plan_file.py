@@ -7,4 +7,10 @@ def parse_plan(planfile):
         lines = stream.readlines()
     plan = [act.strip() for act in lines[:-1]]
     total_cost = int(re.match(r"; cost = (\d+) \(.+ cost\)", lines[-1]).group(1))
-    return plan, total_cost
\ No newline at end of file
+    return plan, total_cost
+
+def write_plan(planfile, plan, total_cost, cost_type):
+    with open(planfile, 'w') as stream:
+        for act in plan:
+            stream.write(act + '\n')
+        stream.write(f"; cost = {total_cost} ({cost_type})\n")
@@ -0,0 +1,20 @@
+#! /usr/bin/env python3
+
+class PlanStep:
+    """
+    The operator applied at a position of a plan. Attributes are read from the operator, which is
+    shared by every step that applies it. Assigning an attribute (e.g. a scaled cost) overrides it
+    for this step only, so the operator itself is never copied nor modified.
+    """
+    def __init__(self, index, operator):
+        self.index = index
+        self.operator = operator
+
+    def __getattr__(self, name):
+        # Only called for attributes not overridden by the step
+        if name == 'operator':
+            raise AttributeError(name)
+        return getattr(self.operator, name)
+
+    def __repr__(self):
+        return f"PlanStep({self.index}, {self.name})"
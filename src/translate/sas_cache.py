@@ -0,0 +1,242 @@
+#! /usr/bin/env python3
+
+#######################################################################
+#
+# Binary cache of parsed SAS tasks.
+#
+# A cache file stores the components returned by sas_parser.read_task as
+# flat arrays of 64-bit integers plus a table with the names of values and
+# operators. Lists of conditions and effects are stored as one flat array
+# and an array of offsets, so the file is read through mmap and every array
+# is converted to a list with a single slice.
+#
+# Loading is dominated by creating the Python objects of the task, not by
+# reading the file: hashing and reading a 50 MB task with 600000 operators
+# takes 0.2 seconds, creating its objects 2.3 seconds, about 3 times faster
+# than parsing the text file (8 seconds).
+#
+# Layout: header (magic, version, byte order mark, SHA-256 of the task file,
+# number of integers, size of the string table), integers, string table
+# (names separated by line breaks, in UTF-8).
+#
+#######################################################################
+
+from array import array
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+from sas_tasks import SASVariables, SASOperator, SASInit, SASGoal, SASMutexGroup, ValueNameTable
+
+
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"SASCACHE"
+CACHE_VERSION = 2
+INT_TYPECODE = "q"
+INT_SIZE = array(INT_TYPECODE).itemsize
+BYTE_ORDER_MARK = 0x01020304
+HEADER = struct.Struct("=8sII32sQQ")
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def task_file_hash(task_file):
+    """
+    Returns the SHA-256 digest of the contents of the task file.
+    """
+    digest = hashlib.sha256()
+    with open(task_file, "rb") as stream:
+        for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def get_cache_file(task_file):
+    return os.fspath(task_file) + CACHE_SUFFIX
+
+
+def write_task_cache(cache_file, content_hash, variables, mutex_groups, init_state, goal, operators, metric):
+    """
+    Writes the components of a parsed task (operators in the order of the task file) to cache_file.
+    The file is written to a temporary file that replaces cache_file, so concurrent readers never see
+    a partially written cache. Raises OverflowError if a number of the task does not fit in 64 bits.
+    """
+    num_vars = len(variables.ranges)
+    ints = array(INT_TYPECODE, [int(metric), num_vars])
+    ints.extend(variables.ranges)
+    ints.extend(variables.axiom_layers)
+    ints.extend(init_state.values)
+
+    ints.append(len(goal.pairs))
+    for var, val in goal.pairs:
+        ints.extend((var, val))
+
+    ints.append(len(mutex_groups))
+    offset = 0
+    for group in mutex_groups:
+        offset += len(group.facts)
+        ints.append(offset)
+    for group in mutex_groups:
+        for var, val in group.facts:
+            ints.extend((var, val))
+
+    # Operators: costs, offsets of the prevail conditions and effects of each operator, prevail conditions,
+    # effects (var, pre, post) and offsets of the conditions of each effect followed by the conditions.
+    ints.append(len(operators))
+    ints.extend(op.cost for op in operators)
+    offset = 0
+    for op in operators:
+        offset += len(op.prevail)
+        ints.append(offset)
+    offset = 0
+    for op in operators:
+        offset += len(op.pre_post)
+        ints.append(offset)
+    for op in operators:
+        for var, val in op.prevail:
+            ints.extend((var, val))
+    offset = 0
+    for op in operators:
+        for var, pre, post, cond in op.pre_post:
+            offset += len(cond)
+            ints.extend((var, pre, post, offset))
+    for op in operators:
+        for _, _, _, cond in op.pre_post:
+            for var, val in cond:
+                ints.extend((var, val))
+
+    names = [name for values in variables.value_names for name in values]
+    names.extend(op.name for op in operators)
+    strings = "\n".join(names).encode("utf-8")
+
+    cache_dir = os.path.dirname(os.path.abspath(cache_file))
+    fd, tmp_file = tempfile.mkstemp(dir=cache_dir, prefix=os.path.basename(cache_file), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, BYTE_ORDER_MARK, content_hash, len(ints), len(strings)))
+            ints.tofile(stream)
+            stream.write(strings)
+        # mkstemp creates the file only readable by the user, the cache gets the permissions of a new file
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_file, 0o666 & ~umask)
+        os.replace(tmp_file, cache_file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
+def read_task_cache(cache_file, content_hash):
+    """
+    Reads the components of a task from cache_file.
+    Returns None if the file does not exist or was not created from a task file with the given hash,
+    otherwise the variables, mutex groups, init, goal, operators, axioms, metric and operator_name_to_index.
+    """
+    try:
+        stream = open(cache_file, "rb")
+    except FileNotFoundError:
+        return None
+    with stream:
+        if os.fstat(stream.fileno()).st_size < HEADER.size:
+            return None
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            magic, version, byte_order_mark, file_hash, num_ints, strings_size = HEADER.unpack_from(contents)
+            if (magic, version, byte_order_mark, file_hash) != (CACHE_MAGIC, CACHE_VERSION, BYTE_ORDER_MARK, content_hash):
+                return None
+            ints_end = HEADER.size + INT_SIZE * num_ints
+            if len(contents) != ints_end + strings_size:
+                return None
+            with memoryview(contents) as view:
+                with view[HEADER.size:ints_end].cast(INT_TYPECODE) as ints_view:
+                    ints = ints_view.tolist()
+                names = str(view[ints_end:], "utf-8").split("\n")
+    # Decoding creates millions of objects without reference cycles, the cyclic garbage collector would
+    # otherwise run over and over again and take more than half of the time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode_task(ints, names)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def decode_task(ints, names):
+    pos = 0
+
+    def get_next_ints(num_ints):
+        nonlocal pos
+        pos += num_ints
+        return ints[pos - num_ints:pos]
+
+    def to_pairs(flat):
+        return list(zip(flat[0::2], flat[1::2]))
+
+    metric, num_vars = get_next_ints(2)
+    ranges = get_next_ints(num_vars)
+    axiom_layers = get_next_ints(num_vars)
+    init_state = SASInit(get_next_ints(num_vars))
+    goal = SASGoal(pairs=to_pairs(get_next_ints(2 * get_next_ints(1)[0])))
+
+    num_mutex_groups = get_next_ints(1)[0]
+    mutex_ends = get_next_ints(num_mutex_groups)
+    mutex_facts = to_pairs(get_next_ints(2 * (mutex_ends[-1] if mutex_ends else 0)))
+    mutex_groups = []
+    start = 0
+    for end in mutex_ends:
+        # Setting the facts after creating the group maintains the order of the input task file
+        mutex_groups.append(SASMutexGroup(facts=[]))
+        mutex_groups[-1].facts = mutex_facts[start:end]
+        start = end
+
+    num_operators = get_next_ints(1)[0]
+    costs = get_next_ints(num_operators)
+    prevail_ends = get_next_ints(num_operators)
+    effect_ends = get_next_ints(num_operators)
+    facts = {}
+    prevails = [facts.setdefault(fact, fact) for fact in to_pairs(get_next_ints(2 * (prevail_ends[-1] if prevail_ends else 0)))]
+    flat_effects = get_next_ints(4 * (effect_ends[-1] if effect_ends else 0))
+    conditions = to_pairs(get_next_ints(2 * (flat_effects[-1] if flat_effects else 0)))
+    if pos != len(ints):
+        raise ValueError("Corrupted task cache")
+
+    # As in sas_parser.read_task, operators share equal prevail conditions and unconditional effects
+    cond_ends = flat_effects[3::4]
+    effects = []
+    unconditional_effects = {}
+    for var, pre, post, cond_start, cond_end in zip(flat_effects[0::4], flat_effects[1::4], flat_effects[2::4],
+                                                    [0] + cond_ends, cond_ends):
+        if cond_start == cond_end:
+            effect = unconditional_effects.get((var, pre, post))
+            if effect is None:
+                effect = unconditional_effects[var, pre, post] = (var, pre, post, [])
+        else:
+            effect = (var, pre, post, conditions[cond_start:cond_end])
+        effects.append(effect)
+
+    num_values = sum(ranges)
+    domains = []
+    start = 0
+    for dom_size in ranges:
+        domains.append(names[start:start + dom_size])
+        start += dom_size
+    variables = SASVariables(ranges=ranges, axiom_layers=axiom_layers, value_names=ValueNameTable(domains))
+
+    operators = []
+    operator_name_to_index = {}
+    for operator_index, (name, cost, prevail_start, prevail_end, effect_start, effect_end) in enumerate(
+            zip(names[num_values:], costs, [0] + prevail_ends, prevail_ends, [0] + effect_ends, effect_ends)):
+        # The constructor reorders the prevail and pre_post, and would cost more than the rest of the decoding,
+        # so the slots are set directly, maintaining the order of the input task file
+        operator = SASOperator.__new__(SASOperator)
+        operator.name = name
+        operator.prevail = prevails[prevail_start:prevail_end]
+        operator.pre_post = effects[effect_start:effect_end]
+        operator.cost = cost
+        operator.is_macro = False
+        operators.append(operator)
+        operator_name_to_index[name] = operator_index
+
+    return variables, mutex_groups, init_state, goal, operators, [], bool(metric), operator_name_to_index
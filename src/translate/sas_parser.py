@@ -10,12 +10,17 @@
 #
 #######################################################################
 
-import sys, os
-from sas_tasks import SASTask, SASVariables, SASOperator, SASInit, SASGoal, SASAxiom, SASMutexGroup
-import subprocess
+import itertools
+import sys
+from sas_tasks import SASTask, SASVariables, SASOperator, SASInit, SASGoal, SASAxiom, SASMutexGroup, ValueNameTable, open_sas_file
+from sas_cache import get_cache_file, read_task_cache, task_file_hash, write_task_cache
 
 
-def parse_task(task_file, verify_parsed_task=False):
+def read_task_by_line(task_file):
+    """
+    Reads the components of a SAS task line by line.
+    Returns the variables, mutex groups, init, goal, operators, axioms, metric and operator_name_to_index.
+    """
     variables = []
     domains = []
     mutex_groups = []
@@ -38,7 +43,7 @@ def parse_task(task_file, verify_parsed_task=False):
         p1, p2 = get_next_line().split()
         return int(p1), int(p2)
 
-    with open(task_file, 'r') as sas_task:
+    with open_sas_file(task_file) as sas_task:
         # Read version
         current_line = get_next_line()
         assert(current_line == 'begin_version')
@@ -80,7 +85,7 @@ def parse_task(task_file, verify_parsed_task=False):
             axiom_layers.append(axiom_layer)
             domains.append(domain_vals)
 
-        variables = SASVariables(ranges=ranges, axiom_layers=axiom_layers,value_names=domains)
+        variables = SASVariables(ranges=ranges, axiom_layers=axiom_layers, value_names=ValueNameTable(domains))
         # Read mutex groups
         num_mutex_groups = get_next_int()
         for _ in range(num_mutex_groups):
@@ -192,21 +197,255 @@ def parse_task(task_file, verify_parsed_task=False):
             axioms.append(SASAxiom(condition=conditions, effect=effect))
 
 
-    # Verify that the read task is equal to original file
-    if verify_parsed_task:
-        task = SASTask(variables=variables, mutexes=mutex_groups, init=init_state, goal=goal, operators=operators, axioms=axioms, metric=metric)
-        verify_file = task_file + ".verify-contents.sas"
-        with open(verify_file, mode='w') as output_file:
-            task.output(stream=output_file)
+    return variables, mutex_groups, init_state, goal, operators, axioms, metric, operator_name_to_index
+
+
+class ParsedLines(dict):
+    """
+    Maps lines of a SAS file to the value parsed from them with parse, so that equal lines are parsed
+    once and share the same value. The values must not be modified.
+    """
+    __slots__ = ("parse",)
+
+    def __init__(self, parse):
+        self.parse = parse
+
+    def __missing__(self, line):
+        value = self[line] = self.parse(line)
+        return value
+
+
+def parse_fact(line):
+    var, val = line.split()
+    return int(var), int(val)
 
-        try:
-            # Some trailing whitespaces and empty lines might mess with filecmp, so now using this.
-            # Did not find a direct way to use filecmp while ignoring trailing whtiespaces and empty lines.
-            are_different = subprocess.check_output(['diff', '-ZB', task_file, verify_file]).decode('utf-8')
-        except subprocess.CalledProcessError as e:
-            are_different = True
-        assert not are_different, "Read task is not equal to input task."
 
-        os.remove(verify_file)
+def parse_effect(line):
+    num_cond_effects, *cond_effects, var_number, old_val, new_val = map(int, line.split())
+    return var_number, old_val, new_val, list(zip(cond_effects[0::2], cond_effects[1::2]))
 
-    return SASTask(variables=variables, mutexes=mutex_groups, init=init_state, goal=goal, operators=operators, axioms=axioms, metric=metric), operator_name_to_index
+
+def read_task(task_file):
+    """
+    Reads the components of a SAS task. The file is read at once and split into lines, blocks of
+    integers (initial state, facts of mutex groups, goals and prevail conditions) are converted
+    in bulk. The checks are the same as in read_task_by_line.
+    Returns the variables, mutex groups, init, goal, operators, axioms, metric and operator_name_to_index.
+    """
+    with open_sas_file(task_file) as sas_task:
+        lines = sas_task.read().split('\n')
+    pos = 0
+
+    def get_next_line():
+        nonlocal pos
+        pos += 1
+        return lines[pos - 1].strip()
+
+    def get_next_int():
+        return int(get_next_line())
+
+    def get_next_lines(num_lines):
+        nonlocal pos
+        pos += num_lines
+        if pos > len(lines):
+            raise ValueError("Unexpected end of file in %s" % task_file)
+        return lines[pos - num_lines:pos]
+
+    def get_next_int_pairs(num_pairs):
+        return [(int(p1), int(p2)) for p1, p2 in map(str.split, get_next_lines(num_pairs))]
+
+    # Read version
+    current_line = get_next_line()
+    assert(current_line == 'begin_version')
+    version = get_next_int()
+    if version != 3:
+        sys.exit("Only version 3 supported.")
+    current_line = get_next_line()
+    assert(current_line == 'end_version')
+
+    # Check metric
+    current_line = get_next_line()
+    assert(current_line == 'begin_metric')
+    metric = get_next_line() != '0'
+    current_line = get_next_line()
+    assert(current_line == 'end_metric')
+
+    # Read variables
+    ranges = []
+    axiom_layers = []
+    domains = []
+    num_vars = get_next_int()
+    for _ in range(num_vars):
+        current_line = get_next_line()
+        assert(current_line == 'begin_variable')
+
+        # Name and axiom
+        get_next_line()
+        axiom_layers.append(get_next_int())
+
+        # Domain
+        dom_size = get_next_int()
+        ranges.append(dom_size)
+        domains.append([value.strip() for value in get_next_lines(dom_size)])
+
+        current_line = get_next_line()
+        assert(current_line == 'end_variable')
+
+    variables = SASVariables(ranges=ranges, axiom_layers=axiom_layers, value_names=ValueNameTable(domains))
+
+    # Read mutex groups
+    mutex_groups = []
+    num_mutex_groups = get_next_int()
+    for _ in range(num_mutex_groups):
+        current_line = get_next_line()
+        assert(current_line == 'begin_mutex_group')
+        current_group = get_next_int_pairs(get_next_int())
+        current_line = get_next_line()
+        assert(current_line == 'end_mutex_group')
+
+        # Adding the facts after creating the group maintains the order of the input task file
+        mutex_groups.append(SASMutexGroup(facts=[]))
+        mutex_groups[-1].facts = current_group
+
+    # Read initial state
+    current_line = get_next_line()
+    assert(current_line == 'begin_state')
+    init_state = SASInit(list(map(int, get_next_lines(num_vars))))
+    current_line = get_next_line()
+    assert(current_line == 'end_state')
+
+    # Read goal
+    current_line = get_next_line()
+    assert(current_line == 'begin_goal')
+    goal = SASGoal(pairs=get_next_int_pairs(get_next_int()))
+    current_line = get_next_line()
+    assert(current_line == 'end_goal')
+
+    # Read operators. This is the largest section, so lines are indexed directly instead of using the helpers.
+    # Operators share the prevail conditions and effects read from equal lines.
+    facts = ParsedLines(parse_fact)
+    effects_by_line = ParsedLines(parse_effect)
+    operators = []
+    operator_name_to_index = {}
+    num_operators = get_next_int()
+    for operator_index in range(num_operators):
+        current_line = lines[pos].strip()
+        assert(current_line == 'begin_operator')
+
+        # Name and prevail conditions.
+        operator_name = '(%s)' % lines[pos + 1]
+        num_prevail_cond = int(lines[pos + 2])
+        pos += 3
+        prevail_cond = [facts[line] for line in lines[pos:pos + num_prevail_cond]]
+        pos += num_prevail_cond
+
+        # Effects
+        num_effects = int(lines[pos])
+        pos += 1
+        effects = [effects_by_line[line] for line in lines[pos:pos + num_effects]]
+        pos += num_effects
+
+        cost = int(lines[pos])
+        current_line = lines[pos + 1].strip()
+        assert(current_line == 'end_operator')
+        pos += 2
+
+        # Adding the prevail and pre_post after creating the operator maintains the order of the input task file
+        operator = SASOperator(name=operator_name, prevail=[], pre_post=[], cost=cost)
+        operator.prevail = prevail_cond
+        operator.pre_post = effects
+        operators.append(operator)
+        if operator_name in operator_name_to_index:
+            print("Warning: multiple actions with the same name %s", operator_name)
+            sys.exit("Multiple actions with the same name not supported by action elimination.")
+        operator_name_to_index[operator_name] = operator_index
+
+    # Axioms...
+    num_axioms = get_next_int()
+    if num_axioms > 0:
+        sys.exit("Axioms not supported by action elimination module.")
+
+    return variables, mutex_groups, init_state, goal, operators, [], metric, operator_name_to_index
+
+
+def read_task_with_cache(task_file, read):
+    """
+    Reads the components of a SAS task from its binary cache (see sas_cache) if the cache was created
+    from the current contents of the task file. Otherwise, the task is read with read and the cache is
+    (re)created. If the cache cannot be written, the task is still returned.
+    """
+    content_hash = task_file_hash(task_file)
+    cache_file = get_cache_file(task_file)
+    try:
+        task_components = read_task_cache(cache_file, content_hash)
+    except (OSError, ValueError) as e:
+        print("Warning: ignoring task cache %s (%s)" % (cache_file, e))
+        task_components = None
+    if task_components is None:
+        task_components = read(task_file)
+        variables, mutex_groups, init_state, goal, operators, axioms, metric, _ = task_components
+        try:
+            write_task_cache(cache_file, content_hash, variables, mutex_groups, init_state, goal, operators, metric)
+        except (OSError, OverflowError) as e:
+            print("Warning: could not write task cache %s (%s)" % (cache_file, e))
+    return task_components
+
+
+def parse_task(task_file, verify_parsed_task=False, by_line=False, use_cache=False):
+    """
+    Parses a SAS task (compressed with gzip if the filename ends with .gz).
+    Returns the task and a dict mapping each operator name to its position in the file.
+    by_line uses the line by line reader instead of the bulk one.
+    use_cache reads the task from a binary cache next to the task file (<task_file>.cache), which is
+    created on the first parse and recreated whenever the contents of the task file change. The cache
+    is only used if requested, so that parsing a task does not write next to it by default.
+    """
+    read = read_task_by_line if by_line else read_task
+    if use_cache:
+        task_components = read_task_with_cache(task_file, read)
+    else:
+        task_components = read(task_file)
+    variables, mutex_groups, init_state, goal, operators, axioms, metric, operator_name_to_index = task_components
+
+    # Operators keep the order of the task file, so operator_name_to_index gives their position in task.operators
+    task = SASTask(variables=variables, mutexes=mutex_groups, init=init_state, goal=goal, operators=operators, axioms=axioms, metric=metric,
+                   sort_operators=False)
+
+    # Verify that the read task is equal to original file
+    if verify_parsed_task:
+        difference = find_first_difference(task_file, task.get_output_lines())
+        if difference is not None:
+            raise ValueError("Read task is not equal to input task: %s" % difference)
+
+    return task, operator_name_to_index
+
+
+def find_first_difference(task_file, output_lines):
+    """
+    Compares the lines of the task file with the lines of a task written with get_output_lines, one line
+    at a time and without writing the task. As with diff -ZB, trailing whitespace and empty lines are ignored.
+    Returns None if they are equal, otherwise a description of the first difference with the section
+    (e.g. "operator 12"), the line number in the task file and both lines.
+    """
+    section = "header"
+    section_count = {}
+    output_lines = (line.rstrip() for line in output_lines)
+    output_lines = (line for line in output_lines if line)
+    with open_sas_file(task_file) as sas_task:
+        task_lines = ((line_number, line.rstrip()) for line_number, line in enumerate(sas_task, start=1))
+        task_lines = ((line_number, line) for line_number, line in task_lines if line)
+        for task_line, output_line in itertools.zip_longest(task_lines, output_lines):
+            if task_line is None:
+                return "the task file ends in %s, expected %r" % (section, output_line)
+            line_number, line = task_line
+            if output_line is None:
+                return "%s, line %d of the task file: unexpected %r" % (section, line_number, line)
+            if line != output_line:
+                return "%s, line %d of the task file: expected %r, found %r" % (section, line_number, output_line, line)
+            if line.startswith("begin_"):
+                section = line[len("begin_"):]
+                section_count[section] = section_count.get(section, -1) + 1
+                section = "%s %d" % (section, section_count[section])
+            elif line.startswith("end_"):
+                section = "after %s" % section
+    return None
@@ -1,7 +1,45 @@
+from array import array
+import gzip
+import os
+
 SAS_FILE_VERSION = 3
 
 DEBUG = False
 
+# Number of lines joined into a single write by write_lines.
+OUTPUT_CHUNK_LINES = 1 << 14
+
+
+def write_lines(stream, lines, chunk_size=OUTPUT_CHUNK_LINES):
+    """Write the lines (without line breaks) to the stream, joining
+    them into blocks of chunk_size lines so that large tasks are
+    written with few calls to stream.write."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            chunk.append("")
+            stream.write("\n".join(chunk))
+            chunk.clear()
+    if chunk:
+        chunk.append("")
+        stream.write("\n".join(chunk))
+
+
+def open_sas_file(filename, mode="r"):
+    """Open a SAS file in text mode, compressed with gzip if the
+    filename ends with ".gz". The filename may be a path object."""
+    if os.fspath(filename).endswith(".gz"):
+        return gzip.open(filename, mode + "t")
+    return open(filename, mode)
+
+
+def operator_sort_key(op):
+    """Canonical order of the operators of a task. Operator names are
+    usually unique, so the lists of conditions and effects are rarely
+    compared."""
+    return (op.name, op.prevail, op.pre_post)
+
 
 class SASTask:
     """Planning task in finite-domain representation.
@@ -9,22 +47,47 @@ class SASTask:
     The user is responsible for making sure that the data fits a
     number of structural restrictions. For example, conditions should
     generally be sorted and mention each variable at most once. See
-    the validate methods for details."""
+    the validate methods for details.
+
+    Operators are sorted by operator_sort_key. The sorting is deferred
+    until the operators are first accessed, so tasks that are only
+    passed around are not sorted. With sort_operators=False, the
+    operators are kept in the given order, e.g. because the caller
+    knows that they are already sorted. Assigning to task.operators
+    sets the operators without sorting them."""
+
+    __slots__ = ("variables", "mutexes", "init", "goal", "_operators",
+                 "_operators_sorted", "axioms", "metric")
 
     def __init__(self, variables, mutexes, init, goal,
-                 operators, axioms, metric):
+                 operators, axioms, metric, sort_operators=True):
         self.variables = variables
         self.mutexes = mutexes
         self.init = init
         self.goal = goal
-        self.operators = sorted(operators, key=lambda op: (
-            op.name, op.prevail, op.pre_post))
+        if sort_operators:
+            self._operators = list(operators)
+            self._operators_sorted = False
+        else:
+            self.operators = operators
         self.axioms = sorted(axioms, key=lambda axiom: (
             axiom.condition, axiom.effect))
         self.metric = metric
         if DEBUG:
             self.validate()
 
+    @property
+    def operators(self):
+        if not self._operators_sorted:
+            self._operators.sort(key=operator_sort_key)
+            self._operators_sorted = True
+        return self._operators
+
+    @operators.setter
+    def operators(self, operators):
+        self._operators = operators
+        self._operators_sorted = True
+
     def validate(self):
         """Fail an assertion if the task is invalid.
 
@@ -76,24 +139,33 @@ class SASTask:
         print("metric: %s" % self.metric)
 
     def output(self, stream):
-        print("begin_version", file=stream)
-        print(SAS_FILE_VERSION, file=stream)
-        print("end_version", file=stream)
-        print("begin_metric", file=stream)
-        print(int(self.metric), file=stream)
-        print("end_metric", file=stream)
-        self.variables.output(stream)
-        print(len(self.mutexes), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def write(self, filename):
+        """Write the task to filename, compressed with gzip if the
+        filename ends with ".gz"."""
+        with open_sas_file(filename, "w") as stream:
+            self.output(stream)
+
+    def get_output_lines(self):
+        yield "begin_version"
+        yield str(SAS_FILE_VERSION)
+        yield "end_version"
+        yield "begin_metric"
+        yield str(int(self.metric))
+        yield "end_metric"
+        yield from self.variables.get_output_lines()
+        yield str(len(self.mutexes))
         for mutex in self.mutexes:
-            mutex.output(stream)
-        self.init.output(stream)
-        self.goal.output(stream)
-        print(len(self.operators), file=stream)
+            yield from mutex.get_output_lines()
+        yield from self.init.get_output_lines()
+        yield from self.goal.get_output_lines()
+        yield str(len(self.operators))
         for op in self.operators:
-            op.output(stream)
-        print(len(self.axioms), file=stream)
+            yield from op.get_output_lines()
+        yield str(len(self.axioms))
         for axiom in self.axioms:
-            axiom.output(stream)
+            yield from axiom.get_output_lines()
 
     def get_encoding_size(self):
         task_size = 0
@@ -108,7 +180,72 @@ class SASTask:
         return task_size
 
 
+class ValueNameTable:
+    """Names of the values of all variables, usable like a list with
+    one list of names per variable.
+
+    The names are stored in a single string, separated by line breaks,
+    with the offsets of the names of each variable in an array, which
+    needs much less memory than one string object per value. The names
+    of a variable are decoded when the variable is first indexed, and
+    kept for later accesses. Iterating over the table decodes the
+    variables one at a time without keeping them. Assigning to the
+    table encodes it again."""
+
+    __slots__ = ("_names", "_starts", "_sizes", "_decoded")
+
+    def __init__(self, value_names):
+        self._encode(value_names)
+
+    def _encode(self, value_names):
+        parts = []
+        self._starts = array("q")
+        self._sizes = array("q")
+        start = 0
+        for names in value_names:
+            part = "\n".join(names)
+            parts.append(part)
+            self._starts.append(start)
+            self._sizes.append(len(names))
+            start += len(part) + 1
+        self._names = "\n".join(parts)
+        self._decoded = {}
+
+    def _decode(self, var):
+        if not self._sizes[var]:
+            return []
+        start = self._starts[var]
+        if var + 1 < len(self._starts):
+            return self._names[start:self._starts[var + 1] - 1].split("\n")
+        return self._names[start:].split("\n")
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __getitem__(self, var):
+        if isinstance(var, slice):
+            return [self[index] for index in range(*var.indices(len(self)))]
+        names = self._decoded.get(var)
+        if names is None:
+            if var < 0:
+                var += len(self)
+            names = self._decoded[var] = self._decode(var)
+        return names
+
+    def __setitem__(self, var, names):
+        value_names = list(self)
+        value_names[var] = names
+        self._encode(value_names)
+
+    def __iter__(self):
+        for var in range(len(self)):
+            names = self._decoded.get(var)
+            yield names if names is not None else self._decode(var)
+
+
 class SASVariables:
+    __slots__ = ("ranges", "axiom_layers", "value_names")
+
     def __init__(self, ranges, axiom_layers, value_names):
         self.ranges = ranges
         self.axiom_layers = axiom_layers
@@ -156,17 +293,20 @@ class SASVariables:
             print("v%d in {%s}%s" % (var, list(range(rang)), axiom_str))
 
     def output(self, stream):
-        print(len(self.ranges), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield str(len(self.ranges))
         for var, (rang, axiom_layer, values) in enumerate(zip(
                 self.ranges, self.axiom_layers, self.value_names)):
-            print("begin_variable", file=stream)
-            print("var%d" % var, file=stream)
-            print(axiom_layer, file=stream)
-            print(rang, file=stream)
+            yield "begin_variable"
+            yield "var%d" % var
+            yield str(axiom_layer)
+            yield str(rang)
             assert rang == len(values), (rang, values)
             for value in values:
-                print(value, file=stream)
-            print("end_variable", file=stream)
+                yield str(value)
+            yield "end_variable"
 
     def get_encoding_size(self):
         # A variable with range k has encoding size k + 1 to also give the
@@ -175,6 +315,8 @@ class SASVariables:
 
 
 class SASMutexGroup:
+    __slots__ = ("facts",)
+
     def __init__(self, facts):
         self.facts = sorted(facts)
 
@@ -190,17 +332,22 @@ class SASMutexGroup:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_mutex_group", file=stream)
-        print(len(self.facts), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield "begin_mutex_group"
+        yield str(len(self.facts))
         for var, val in self.facts:
-            print(var, val, file=stream)
-        print("end_mutex_group", file=stream)
+            yield "%s %s" % (var, val)
+        yield "end_mutex_group"
 
     def get_encoding_size(self):
         return len(self.facts)
 
 
 class SASInit:
+    __slots__ = ("values",)
+
     def __init__(self, values):
         self.values = values
 
@@ -220,13 +367,18 @@ class SASInit:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_state", file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield "begin_state"
         for val in self.values:
-            print(val, file=stream)
-        print("end_state", file=stream)
+            yield str(val)
+        yield "end_state"
 
 
 class SASGoal:
+    __slots__ = ("pairs",)
+
     def __init__(self, pairs):
         self.pairs = sorted(pairs)
 
@@ -240,22 +392,28 @@ class SASGoal:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_goal", file=stream)
-        print(len(self.pairs), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield "begin_goal"
+        yield str(len(self.pairs))
         for var, val in self.pairs:
-            print(var, val, file=stream)
-        print("end_goal", file=stream)
+            yield "%s %s" % (var, val)
+        yield "end_goal"
 
     def get_encoding_size(self):
         return len(self.pairs)
 
 
 class SASOperator:
+    __slots__ = ("name", "prevail", "pre_post", "cost", "is_macro")
+
     def __init__(self, name, prevail, pre_post, cost):
         self.name = name
         self.prevail = sorted(prevail)
         self.pre_post = self._canonical_pre_post(pre_post)
         self.cost = cost
+        self.is_macro = False
 
     def _canonical_pre_post(self, pre_post):
         # Return a sorted and uniquified version of pre_post. We would
@@ -357,19 +515,21 @@ class SASOperator:
             print("  v%d: %d -> %d%s" % (var, pre, post, cond_str))
 
     def output(self, stream):
-        print("begin_operator", file=stream)
-        print(self.name[1:-1], file=stream)
-        print(len(self.prevail), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield "begin_operator"
+        yield self.name[1:-1]
+        yield str(len(self.prevail))
         for var, val in self.prevail:
-            print(var, val, file=stream)
-        print(len(self.pre_post), file=stream)
+            yield "%s %s" % (var, val)
+        yield str(len(self.pre_post))
         for var, pre, post, cond in self.pre_post:
-            print(len(cond), end=' ', file=stream)
-            for cvar, cval in cond:
-                print(cvar, cval, end=' ', file=stream)
-            print(var, pre, post, file=stream)
-        print(self.cost, file=stream)
-        print("end_operator", file=stream)
+            yield " ".join(["%d" % len(cond)] +
+                           ["%s %s" % (cvar, cval) for cvar, cval in cond] +
+                           ["%s %s %s" % (var, pre, post)])
+        yield str(self.cost)
+        yield "end_operator"
 
     def get_encoding_size(self):
         size = 1 + len(self.prevail)
@@ -398,6 +558,8 @@ class SASOperator:
 
 
 class SASAxiom:
+    __slots__ = ("condition", "effect")
+
     def __init__(self, condition, effect):
         self.condition = sorted(condition)
         self.effect = effect
@@ -465,13 +627,16 @@ class SASAxiom:
         print("  v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_rule", file=stream)
-        print(len(self.condition), file=stream)
+        write_lines(stream, self.get_output_lines())
+
+    def get_output_lines(self):
+        yield "begin_rule"
+        yield str(len(self.condition))
         for var, val in self.condition:
-            print(var, val, file=stream)
+            yield "%s %s" % (var, val)
         var, val = self.effect
-        print(var, 1 - val, val, file=stream)
-        print("end_rule", file=stream)
+        yield "%s %s %s" % (var, 1 - val, val)
+        yield "end_rule"
 
     def get_encoding_size(self):
         return 1 + len(self.condition)
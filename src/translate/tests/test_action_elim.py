@@ -0,0 +1,221 @@
+import os.path
+import random
+import subprocess
+import sys
+
+from action_elim import (FactAchievers, apply_if_applicable, eliminate_actions, find_triv_nec_actions, find_triv_unnec_actions,
+                         get_operators_from_plan, greedy_eliminate_actions, parse_args)
+from plan_parser import parse_plan
+from sas_parser import parse_task
+from sas_tasks import SASGoal, SASInit, SASOperator, SASVariables
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSLATE_DIR = os.path.dirname(DIR)
+REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
+GRID = os.path.join(REPO, "domains", "grid")
+TASK = os.path.join(GRID, "output.sas")
+PLAN = os.path.join(GRID, "sas_plan_no_skip")
+DOMAIN = os.path.join(GRID, "domain.pddl")
+PROBLEM = os.path.join(GRID, "prob6.pddl")
+
+def test_plan_steps_share_operators():
+    task, operator_name_to_index = parse_task(TASK)
+    plan, _ = parse_plan(PLAN)
+    steps = get_operators_from_plan(task.operators, plan, operator_name_to_index, True)
+    assert [step.index for step in steps] == list(range(len(plan)))
+    assert [step.name for step in steps] == plan
+    operator = task.operators[operator_name_to_index[plan[0]]]
+    assert steps[0].operator is operator
+    original_cost = operator.cost
+    steps[0].cost = original_cost + 5
+    assert steps[0].cost == original_cost + 5
+    assert operator.cost == original_cost
+
+def test_translate_plan_actions(tmp_path):
+    sas_file = str(tmp_path / "output.sas")
+    subprocess.check_call([sys.executable, "translate.py", DOMAIN, PROBLEM, "--plan", PLAN, "--sas-file", sas_file],
+                          cwd=TRANSLATE_DIR, stdout=subprocess.DEVNULL)
+    task, operator_name_to_index = parse_task(sas_file, use_cache=False)
+    plan, _ = parse_plan(PLAN)
+    assert set(operator_name_to_index) == set(plan)
+    steps = get_operators_from_plan(task.operators, plan, operator_name_to_index, True)
+    assert [step.name for step in steps] == plan
+
+def test_greedy_eliminate_actions():
+    task, operator_name_to_index = parse_task(TASK)
+    plan, _ = parse_plan(PLAN)
+    reduced_plan = greedy_eliminate_actions(task, plan, operator_name_to_index)
+    assert len(reduced_plan) == len(plan) - 2
+    remaining_actions = iter(plan)
+    assert all(op in remaining_actions for op in reduced_plan)
+    state = list(task.init.values)
+    assert all(apply_if_applicable(task.operators[operator_name_to_index[op]], state) for op in reduced_plan)
+    assert all(state[var] == val for var, val in task.goal.pairs)
+
+def test_greedy_plan_file(tmp_path):
+    task, operator_name_to_index = parse_task(TASK)
+    plan, _ = parse_plan(PLAN)
+    greedy_plan_file = str(tmp_path / "greedy_plan")
+    options = parse_args(["-t", TASK, "-p", PLAN, "-d", str(tmp_path), "--greedy-plan-file", greedy_plan_file])
+    eliminate_actions(task, operator_name_to_index, plan, options)
+    reduced_plan = greedy_eliminate_actions(task, plan, operator_name_to_index)
+    assert parse_plan(greedy_plan_file) == (reduced_plan, len(reduced_plan))
+
+# Reference implementation of the detection of trivially necessary and unnecessary actions before the
+# achievers were indexed: every achiever is a [start, end] pair and every lookup scans all achievers.
+def reference_triv_nec_actions(init, goal, variables, plan, reach_fix_point):
+    fact_achievers = [[[] for _ in range(dom_size)] for dom_size in variables.ranges]
+    for var, val in enumerate(init.values):
+        fact_achievers[var][val].append([-1, len(plan) + 2])
+    for index, op in enumerate(plan):
+        for var, _, new_val, _ in op.pre_post:
+            fact_achievers[var][new_val].append([index, len(plan) + 2])
+    extended_plan = plan + [SASOperator("virtual_goal", list(goal.pairs), [], 0)]
+    triv_nec = [set() for _ in extended_plan]
+    triv_nec[-1] = {-1}
+
+    def update_achievers(op_index):
+        for var, _, new_val, eff_conditions in extended_plan[op_index].pre_post:
+            if not eff_conditions or (var, new_val) in triv_nec[op_index]:
+                for val, achievers in enumerate(fact_achievers[var]):
+                    if val != new_val:
+                        for achiever in achievers:
+                            if achiever[0] >= op_index:
+                                break
+                            achiever[1] = min(op_index, achiever[1])
+
+    def check(var, val, op_index):
+        achievers = [start for start, end in fact_achievers[var][val] if start < op_index <= end]
+        if val > -1 and len(achievers) < 2 and achievers[0] > -1 and (var, val) not in triv_nec[achievers[0]]:
+            triv_nec[achievers[0]].add((var, val))
+            if reach_fix_point:
+                update_achievers(achievers[0])
+                return False
+        return True
+
+    is_fix_point = False
+    while not is_fix_point:
+        is_fix_point = True
+        for op_index in range(len(extended_plan) - 1, -1, -1):
+            if triv_nec[op_index]:
+                op = extended_plan[op_index]
+                for var, val in op.prevail:
+                    is_fix_point &= check(var, val, op_index)
+                for var, val, new_val, eff_conditions in op.pre_post:
+                    if not eff_conditions or (var, new_val) in triv_nec[op_index]:
+                        is_fix_point &= check(var, val, op_index)
+                        for cond_var, cond_val in eff_conditions:
+                            is_fix_point &= check(cond_var, cond_val, op_index)
+    return [bool(elem) for elem in triv_nec], fact_achievers
+
+def reference_triv_unnec_actions(goal, variables, plan, triv_nec, fact_achievers):
+    extended_plan = plan + [SASOperator("virtual_goal", list(goal.pairs), [], 0)]
+    producer_consumer = [set() for _ in extended_plan]
+    fact_overwritten = [[] for _ in variables.ranges]
+    triv_unnec = [False for _ in extended_plan]
+    for index, op in enumerate(extended_plan):
+        conditions = list(op.prevail)
+        for var, old_val, _, _ in op.pre_post:
+            if triv_nec[index]:
+                fact_overwritten[var].append(index)
+            if old_val > -1:
+                conditions.append((var, old_val))
+        for var, val in conditions:
+            for start, end in fact_achievers[var][val]:
+                if -1 < start < index <= end:
+                    producer_consumer[start].add((index, var))
+    for op_index in range(len(extended_plan) - 1, -1, -1):
+        if not triv_nec[op_index]:
+            triv_unnec[op_index] = all(triv_unnec[consumer] for consumer, _ in producer_consumer[op_index]) or all(
+                any(op_index < over_writer < consumer for over_writer in fact_overwritten[var])
+                for consumer, var in producer_consumer[op_index])
+    return triv_unnec
+
+def generate_task(rng, length, num_vars, dom_size):
+    """
+    Valid random plan over few variables, so that facts have repeated achievers. Effects may have no
+    precondition value or be conditional, in which case the condition may not hold when the action is applied.
+    """
+    variables = SASVariables([dom_size] * num_vars, [-1] * num_vars,
+                             [[f"Atom v{var}-{val}()" for val in range(dom_size)] for var in range(num_vars)])
+    state = [rng.randrange(dom_size) for _ in range(num_vars)]
+    init = SASInit(state[:])
+    plan = []
+    for step in range(length):
+        prevail_var, *effect_vars = rng.sample(range(num_vars), 3)
+        pre_post = []
+        for var in effect_vars[:rng.randint(1, 2)]:
+            pre = rng.choice([state[var], state[var], -1])
+            conditions = [] if rng.random() < 0.7 else [(prevail_var, rng.randrange(dom_size))]
+            pre_post.append((var, pre, rng.randrange(dom_size), conditions))
+        new_state = state[:]
+        for var, _, post, conditions in pre_post:
+            if all(state[cond_var] == cond_val for cond_var, cond_val in conditions):
+                new_state[var] = post
+        plan.append(SASOperator(f"(step{step})", [(prevail_var, state[prevail_var])], pre_post, 1))
+        state = new_state
+    goal = SASGoal(sorted((var, state[var]) for var in rng.sample(range(num_vars), 2)))
+    return init, goal, variables, plan
+
+def test_triv_nec_and_unnec_actions_randomized():
+    rng = random.Random(2023)
+    num_compared = 0
+    for _ in range(300):
+        init, goal, variables, plan = generate_task(rng, rng.randint(1, 25), rng.randint(3, 6), rng.randint(2, 4))
+        for reach_fix_point in (False, True):
+            try:
+                expected_nec, expected_achievers = reference_triv_nec_actions(init, goal, variables, plan, reach_fix_point)
+            except IndexError:
+                # Conditional effects that do not hold may leave a precondition without achievers
+                continue
+            triv_nec, fact_achievers = find_triv_nec_actions(init, goal, variables, plan, reach_fix_point)
+            assert triv_nec == expected_nec
+            triv_unnec = find_triv_unnec_actions(init, goal, variables, plan, triv_nec, fact_achievers)
+            assert triv_unnec == reference_triv_unnec_actions(goal, variables, plan, expected_nec, expected_achievers)
+            num_compared += 1
+    assert num_compared > 500
+
+def make_variables(*dom_sizes):
+    return SASVariables(list(dom_sizes), [-1] * len(dom_sizes),
+                        [[f"Atom v{var}-{val}()" for val in range(dom_size)] for var, dom_size in enumerate(dom_sizes)])
+
+def test_triv_unnec_overwritten_fact_achieved_again():
+    # x=1 is achieved by (a), overwritten by the triv. nec. (n), achieved again by (b) and read by (c).
+    # (e) reads y=1 of (n) and is only checked after (c), so finding (n) makes the worklist check (c) again.
+    variables = make_variables(3, 2, 2, 2)
+    x, y, g, h = range(4)
+    init = SASInit([0, 0, 0, 0])
+    goal = SASGoal([(g, 1), (h, 1)])
+    plan = [SASOperator("(a)", [], [(x, -1, 1, [])], 1),
+            SASOperator("(n)", [], [(x, -1, 2, []), (y, 0, 1, [])], 1),
+            SASOperator("(e)", [(y, 1)], [(h, 0, 1, [])], 1),
+            SASOperator("(b)", [], [(x, -1, 1, [])], 1),
+            SASOperator("(c)", [(x, 1)], [(g, 0, 1, [])], 1)]
+    for reach_fix_point, expected_nec in ((False, [False, True, True, False, True]),
+                                          (True, [False, True, True, True, True])):
+        triv_nec, fact_achievers = find_triv_nec_actions(init, goal, variables, plan, reach_fix_point)
+        assert triv_nec[:-1] == expected_nec
+        triv_unnec = find_triv_unnec_actions(init, goal, variables, plan, triv_nec, fact_achievers)
+        assert triv_unnec[:-1] == [True, False, False, False, False]
+
+def test_fact_achievers_cutoff_at_achiever():
+    # (p2) sets x=1 and, with a condition, x=2. The achiever of x=2 at the cutoff is not capped by it
+    variables = make_variables(3, 2)
+    plan = [SASOperator("(p0)", [], [(0, -1, 1, [])], 1),
+            SASOperator("(p1)", [], [(0, -1, 2, [])], 1),
+            SASOperator("(p2)", [], [(0, -1, 1, []), (0, -1, 2, [(1, 1)])], 1),
+            SASOperator("(p3)", [], [(0, -1, 2, [])], 1)]
+    fact_achievers = FactAchievers(SASInit([0, 0]), variables, plan)
+
+    def achievers(val, op_index):
+        lo, hi = fact_achievers.get_achievers(0, val, op_index)
+        return fact_achievers.starts[0][val][lo:hi]
+
+    fact_achievers.cap(0, 1, 2)
+    assert [achievers(0, op_index) for op_index in (2, 3)] == [[-1], []]
+    assert [achievers(1, op_index) for op_index in (2, 3)] == [[0], [0, 2]]
+    assert [achievers(2, op_index) for op_index in (2, 3, 4)] == [[1], [2], [2, 3]]
+    # The conditional effect at the same position caps the other values, too
+    fact_achievers.cap(0, 2, 2)
+    assert [achievers(1, op_index) for op_index in (2, 3)] == [[0], [2]]
+    assert [achievers(2, op_index) for op_index in (2, 3, 4)] == [[1], [2], [2, 3]]
@@ -0,0 +1,47 @@
+import argparse
+import importlib.util
+import os.path
+from pathlib import Path
+import shutil
+import sys
+
+from explanation_redundant_actions import EXPLAIN_ALL
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
+BENCHMARKS_DIR = os.path.join(REPO, "misc", "benchmarks")
+GRID = os.path.join(REPO, "domains", "grid")
+
+def load_explain_corpus():
+    sys.path.insert(0, BENCHMARKS_DIR)
+    try:
+        spec = importlib.util.spec_from_file_location("explain_corpus", os.path.join(BENCHMARKS_DIR, "explain-corpus.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(BENCHMARKS_DIR)
+    return module
+
+def test_explain_task(tmp_path):
+    explain_corpus = load_explain_corpus()
+    plan_file = tmp_path / "plans" / "grid" / "grid06.solution"
+    plan_file.parent.mkdir(parents=True)
+    shutil.copy(os.path.join(GRID, "sas_plan_no_skip"), plan_file)
+    skip_plan_file = tmp_path / "skip-plans" / "grid" / "grid06.solution"
+    skip_plan_file.parent.mkdir(parents=True)
+    shutil.copy(os.path.join(GRID, "sas_plan_skip"), skip_plan_file)
+    # A broken plan only produces an error record
+    broken_plan_file = plan_file.parent / "grid07.solution"
+    broken_plan_file.write_text("(move node0-0 node1-0)\n")
+    shutil.copy(skip_plan_file, skip_plan_file.parent / broken_plan_file.name)
+
+    args = argparse.Namespace(skip_plans=str(tmp_path / "skip-plans"), work_dir=str(tmp_path / "work"),
+                              subsequence=True, explain=EXPLAIN_ALL, objects=True, chains=True)
+    records, timings = explain_corpus.explain_task(
+        Path(GRID) / "domain.pddl", Path(GRID) / "prob6.pddl", [plan_file, broken_plan_file], args)
+    plan_records = [record for record in records if record["plan"] == plan_file.name]
+    assert plan_records[0]["type"] == "plan"
+    assert plan_records[0]["redundant_actions"] == [12, 16]
+    assert [record["action"] for record in plan_records if record["type"] == "explanation"] == list(range(1, 17))
+    assert [record["type"] for record in records if record["plan"] == broken_plan_file.name] == ["error"]
+    assert timings["parse_task"] > 0
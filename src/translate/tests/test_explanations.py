@@ -0,0 +1,134 @@
+import json
+import os.path
+import shutil
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+from explanation_redundant_actions import ExplanationService, FactTimeline, build_explanation_index, create_server, extract_causal_links, get_irrelevant_objects, get_object_positions, get_object_usage, get_operators_from_plan
+from plan_parser import parse_plan
+from sas_parser import parse_task
+from sas_tasks import SASGoal, SASInit, SASOperator, SASTask, SASVariables
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
+GRID = os.path.join(REPO, "domains", "grid")
+TASK = os.path.join(GRID, "output.sas")
+PLAN = os.path.join(GRID, "sas_plan_no_skip")
+SKIP_PLAN = os.path.join(GRID, "sas_plan_skip")
+TRANSLATE_DIR = os.path.dirname(DIR)
+
+def test_extract_causal_links():
+    task, operator_name_to_index = parse_task(TASK)
+    plan, _ = parse_plan(PLAN)
+    plan_operators = get_operators_from_plan(task.operators, plan, operator_name_to_index, True)
+    causal_links, prevail_links = extract_causal_links(task, plan_operators)
+    assert causal_links == [
+        (0, (0, 0), 12), (0, (1, 0), -1), (0, (2, 0), 1), (0, (3, 0), 3), (0, (4, 0), 2),
+        (7, (4, 0), 11), (15, (4, 0), -1), (0, (5, 3), 2), (0, (6, 1), 11), (1, (2, 3), 4),
+        (2, (5, 9), 7), (3, (3, 1), -1), (4, (2, 4), 5), (9, (2, 4), 10), (13, (2, 4), 14),
+        (16, (2, 4), -1), (5, (2, 7), 6), (6, (2, 8), 8), (7, (5, 8), -1), (8, (2, 5), 9),
+        (14, (2, 5), 16), (10, (2, 1), 13), (11, (6, 9), 15), (12, (0, 1), -1), (15, (6, 5), -1)]
+    assert prevail_links == [
+        (1, (2, 3), 2), (2, (5, 9), 3), (1, (2, 3), 3), (3, (3, 1), 4), (6, (2, 8), 7),
+        (3, (3, 1), 9), (10, (2, 1), 11), (11, (6, 9), 12), (10, (2, 1), 12), (3, (3, 1), 13),
+        (14, (2, 5), 15), (3, (3, 1), 16)]
+
+def test_fact_timeline():
+    timeline = FactTimeline(0)
+    for step in (3, 7, 8):
+        timeline.add_producer(step)
+    assert [timeline.last_producer_before(step) for step in (0, 1, 3, 4, 8, 20)] == [None, 0, 0, 3, 7, 8]
+
+def test_explanation_index():
+    task, operator_name_to_index = parse_task(TASK)
+    plan, _ = parse_plan(PLAN)
+    ae_plan, _ = parse_plan(SKIP_PLAN)
+    index = build_explanation_index(task, operator_name_to_index, plan, ae_plan, True)
+    assert index.list_pos_redundant_actions == [12, 16]
+    assert index.is_redundant(12) and not index.is_redundant(11)
+    assert index.get_consumers(12) == [(-1, (0, 1))]
+    for (producer, var_value, consumer), chain in index.causal_chain_list:
+        assert (producer, var_value) in index.get_relevant_producers(consumer, consumer)
+        assert index.get_redundant_producer(consumer, var_value) is not None
+
+def test_cyclic_causal_chain():
+    # Effects with any previous value consume the value 1 of the variable, so (b) both consumes and produces
+    # var0=1, which links it to itself
+    variables = SASVariables([3], [-1], [["Atom v(0)", "Atom v(1)", "Atom v(2)"]])
+    operators = [SASOperator("(a)", [], [(0, -1, 2, [])], 1), SASOperator("(b)", [], [(0, -1, 1, [])], 1)]
+    task = SASTask(variables, [], SASInit([1]), SASGoal([(0, 1)]), operators, [], True)
+    operator_name_to_index = {op.name: index for index, op in enumerate(task.operators)}
+    index = build_explanation_index(task, operator_name_to_index, ["(a)", "(b)"], ["(skip-action plan-pos-0)", "(b)"], True)
+    assert index.causal_chain_list == [((0, (0, 1), 2), [2, 2])]
+
+def test_batch_explanations():
+    output = subprocess.check_output(
+        [sys.executable, "explanation_redundant_actions.py", "-t", TASK, "-p", PLAN, "-s", SKIP_PLAN,
+         "--subsequence", "--explain", "all", "--objects", "--chains"],
+        cwd=TRANSLATE_DIR, stderr=subprocess.DEVNULL, encoding="utf-8")
+    records = [json.loads(line) for line in output.splitlines()]
+    assert records[0]["type"] == "plan"
+    assert records[0]["redundant_actions"] == [12, 16]
+    assert records[1]["irrelevant_objects"] == ["node0-2", "triangle"]
+    assert records[1]["object_usage"]["triangle"] == 1
+    explanations = [record for record in records if record["type"] == "explanation"]
+    assert [record["action"] for record in explanations] == list(range(1, 17))
+    assert [record["action"] for record in explanations if record["redundant"]] == [12, 16]
+
+def test_explanation_service(tmp_path):
+    server = create_server("127.0.0.1", 0, 2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%d/" % server.server_address[1]
+
+    def post(query):
+        request = urllib.request.Request(url, data=json.dumps(query).encode())
+        with urllib.request.urlopen(request) as response:
+            return [json.loads(line) for line in response.read().splitlines()]
+
+    try:
+        query = {"task": TASK, "plan": PLAN, "splan": SKIP_PLAN, "subsequence": True, "explain": [12, 3]}
+        records = post(query)
+        assert records[0]["redundant_actions"] == [12, 16]
+        assert [(record["action"], record["redundant"]) for record in records[1:]] == [(12, True), (3, False)]
+        assert post(query) == records
+        assert len(server.service.tasks.entries) == 1
+        try:
+            post(dict(query, explain=[17]))
+            assert False
+        except urllib.error.HTTPError as error:
+            assert error.code == 400
+        unknown_plan = tmp_path / "sas_plan_unknown"
+        with open(PLAN) as stream:
+            unknown_plan.write_text("(teleport node0-0 node4-4)\n" + stream.read())
+        try:
+            post(dict(query, plan=str(unknown_plan)))
+            assert False
+        except urllib.error.HTTPError as error:
+            assert error.code == 400
+            assert "teleport" in json.loads(error.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_explanation_service_file_changed(tmp_path):
+    plan_file = tmp_path / "sas_plan"
+    shutil.copy(PLAN, plan_file)
+    service = ExplanationService(4)
+    query = {"task": TASK, "plan": str(plan_file), "splan": SKIP_PLAN}
+    records = service.answer(query)
+    assert service.answer(query) == records
+    assert len(service.plans.entries) == 1
+    stat = os.stat(plan_file)
+    os.utime(plan_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert service.answer(query) == records
+    assert len(service.plans.entries) == 2
+    assert len(service.tasks.entries) == 1
+
+def test_object_usage_repeated_argument():
+    object_positions = get_object_positions(["(drive t1 l1 l1)", "(load p1 t1 l1)", "(drive t1 l1 l2)"])
+    assert object_positions == {"t1": [1, 2, 3], "l1": [1, 2, 3], "p1": [2], "l2": [3]}
+    assert get_object_usage(object_positions) == {"t1": 3, "l1": 3, "p1": 1, "l2": 1}
+    assert get_irrelevant_objects(object_positions, {1, 2}) == ["p1"]
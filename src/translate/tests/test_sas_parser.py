@@ -0,0 +1,112 @@
+import os.path
+from pathlib import Path
+import shutil
+
+import pytest
+
+from sas_cache import get_cache_file, read_task_cache, task_file_hash
+from sas_parser import parse_task
+from sas_tasks import SASTask, ValueNameTable
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
+TASK = os.path.join(REPO, "domains", "grid", "output.sas")
+
+def test_task_cache(tmp_path):
+    task_file = str(tmp_path / "output.sas")
+    shutil.copy(TASK, task_file)
+    task, operator_name_to_index = parse_task(task_file, use_cache=False)
+    assert not os.path.exists(get_cache_file(task_file))
+
+    for _ in range(2):
+        # The first parse creates the cache and the second one reads it
+        cached_task, cached_operator_name_to_index = parse_task(task_file, verify_parsed_task=True, use_cache=True)
+        assert list(cached_task.get_output_lines()) == list(task.get_output_lines())
+        assert cached_operator_name_to_index == operator_name_to_index
+    assert read_task_cache(get_cache_file(task_file), task_file_hash(task_file)) is not None
+
+    # Changing the task invalidates the cache
+    with open(task_file, "a") as stream:
+        stream.write("\n")
+    assert read_task_cache(get_cache_file(task_file), task_file_hash(task_file)) is None
+    parse_task(task_file, use_cache=True)
+    assert read_task_cache(get_cache_file(task_file), task_file_hash(task_file)) is not None
+
+def test_task_cache_path(tmp_path):
+    task_file = tmp_path / "output.sas"
+    shutil.copy(TASK, task_file)
+    umask = os.umask(0o022)
+    try:
+        parse_task(task_file, use_cache=True)
+    finally:
+        os.umask(umask)
+    cache_file = get_cache_file(task_file)
+    assert read_task_cache(cache_file, task_file_hash(task_file)) is not None
+    assert os.stat(cache_file).st_mode & 0o777 == 0o644
+
+@pytest.mark.parametrize("cost", [3000000000, 2 ** 64])
+def test_task_cache_large_cost(tmp_path, cost):
+    task_file = str(tmp_path / "output.sas")
+    with open(TASK) as stream:
+        lines = stream.read().split("\n")
+    lines[lines.index("end_operator") - 1] = str(cost)
+    with open(task_file, "w") as stream:
+        stream.write("\n".join(lines))
+    task, _ = parse_task(task_file, use_cache=False)
+    assert task.operators[0].cost == cost
+    for _ in range(2):
+        cached_task, _ = parse_task(task_file, use_cache=True)
+        assert list(cached_task.get_output_lines()) == list(task.get_output_lines())
+    # Costs that do not fit in 64 bits are parsed without a cache
+    assert os.path.exists(get_cache_file(task_file)) == (cost < 2 ** 63)
+
+def test_parse_task_path():
+    task, operator_name_to_index = parse_task(Path(TASK), use_cache=False)
+    expected_task, expected_operator_name_to_index = parse_task(TASK, use_cache=False)
+    assert list(task.get_output_lines()) == list(expected_task.get_output_lines())
+    assert operator_name_to_index == expected_operator_name_to_index
+
+def test_verify_parsed_task(tmp_path):
+    task_file = str(tmp_path / "output.sas")
+    with open(TASK) as stream:
+        lines = stream.read().split("\n")
+    # Trailing whitespace and empty lines are ignored
+    lines[0] += "  "
+    lines += ["", ""]
+    with open(task_file, "w") as stream:
+        stream.write("\n".join(lines))
+    parse_task(task_file, verify_parsed_task=True, use_cache=False)
+
+    # The names of the variables are not read, so the difference is only found by the verification
+    lines[lines.index("var3")] = "grid-position"
+    with open(task_file, "w") as stream:
+        stream.write("\n".join(lines))
+    with pytest.raises(ValueError, match="variable 3, line %d of the task file" % (lines.index("grid-position") + 1)):
+        parse_task(task_file, verify_parsed_task=True, use_cache=False)
+
+def test_operator_order(tmp_path):
+    task, _ = parse_task(TASK, use_cache=False)
+    operators = list(reversed(task.operators))
+    sorted_task = SASTask(task.variables, task.mutexes, task.init, task.goal, operators, task.axioms, task.metric)
+    assert sorted_task.operators == task.operators
+    assert operators[0] is task.operators[-1]
+
+    # Parsed operators keep the order of the task file
+    unsorted_task = SASTask(task.variables, task.mutexes, task.init, task.goal, operators, task.axioms, task.metric,
+                            sort_operators=False)
+    task_file = str(tmp_path / "output.sas")
+    unsorted_task.write(task_file)
+    parsed_task, operator_name_to_index = parse_task(task_file, verify_parsed_task=True, use_cache=False)
+    assert [op.name for op in parsed_task.operators] == [op.name for op in operators]
+    assert all(parsed_task.operators[index].name == name for name, index in operator_name_to_index.items())
+
+def test_value_name_table():
+    task, _ = parse_task(TASK, use_cache=False)
+    value_names = task.variables.value_names
+    assert isinstance(value_names, ValueNameTable)
+    names = list(value_names)
+    assert len(value_names) == len(task.variables.ranges) == len(names)
+    assert [len(var_names) for var_names in names] == task.variables.ranges
+    assert value_names[2] is value_names[2] and value_names[-1] == names[-1]
+    value_names[:2] = [["Atom a()", "Atom b()"], []]
+    assert list(value_names) == [["Atom a()", "Atom b()"], []] + names[2:]
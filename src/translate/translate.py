@@ -23,6 +23,7 @@ import normalize
 import options
 import pddl
 import pddl_parser
+from plan_parser import parse_plan
 import sas_tasks
 import signal
 import simplify
@@ -551,8 +552,13 @@ def append_static_atoms(task, sas_task, atoms):
 
 def pddl_to_sas(task):
     with timers.timing("Instantiating", block=True):
-        (relaxed_reachable, atoms, actions, goal_list, axioms,
-         reachable_action_params) = instantiate.explore(task)
+        if options.plan:
+            plan, _ = parse_plan(options.plan)
+            (relaxed_reachable, atoms, actions, goal_list, axioms,
+             reachable_action_params) = instantiate.explore_plan(task, plan)
+        else:
+            (relaxed_reachable, atoms, actions, goal_list, axioms,
+             reachable_action_params) = instantiate.explore(task)
 
     if not relaxed_reachable:
         return unsolvable_sas_task("No relaxed solution")
@@ -613,11 +619,13 @@ def pddl_to_sas(task):
             except simplify.TriviallySolvable:
                 return solvable_sas_task("Simplified to empty goal")
 
-    if options.reorder_variables or options.filter_unimportant_vars:
+    # Filtering unimportant variables could remove actions of the plan
+    filter_unimportant_vars = options.filter_unimportant_vars and not options.plan
+    if options.reorder_variables or filter_unimportant_vars:
         with timers.timing("Reordering and filtering variables", block=True):
             variable_order.find_and_apply_variable_order(
                 sas_task, options.reorder_variables,
-                options.filter_unimportant_vars)
+                filter_unimportant_vars)
 
     if options.dump_static_atoms:
         append_static_atoms(task, sas_task, atoms)
@@ -742,8 +750,7 @@ def main():
     dump_statistics(sas_task)
 
     with timers.timing("Writing output"):
-        with open(options.sas_file, "w") as output_file:
-            sas_task.output(output_file)
+        sas_task.write(options.sas_file)
     print("Done! %s" % timer)
 
 
@@ -7,38 +7,45 @@
 #-------------------------------------------------------------------------------------------------------------------------------------
 YELLOW='\033[0;33m' 
 WHITE='\033[0;37m'
-# Remove previous output files
-rm output.sas action-elimination.sas original-op-costs.txt sas_plan_original sas_plan_skip
+# All output files are stored in a workspace of this run (WORK_DIR, a new temporary directory by default),
+# so that several tests can run at the same time
+REPO_DIR=$(cd "$(dirname "$0")/.." && pwd)
+DOMAIN_FILE=$(realpath "$1")
+PROBLEM_FILE=$(realpath "$2")
+if [ -n "$3" ]; then PLAN_FILE=$(realpath "$3"); fi
+WORK_DIR=${WORK_DIR:-$(mktemp -d)}
+mkdir -p "$WORK_DIR" && cd "$WORK_DIR" || exit 1
+echo -e "${YELLOW}TESTING: Output files are stored in $WORK_DIR${WHITE}"
 
 # 1 FD translate. Generates: output.sas
 echo -e "${YELLOW}TESTING: Calling FD translator for original task${WHITE}"
-../fast-downward.py --translate  $1 $2
+"$REPO_DIR"/fast-downward.py --translate "$DOMAIN_FILE" "$PROBLEM_FILE"
 
 # 2 FD solving. Generates sas_plan
 
-if [ -z "$3" ]
+if [ -z "$PLAN_FILE" ]
   then
     echo -e "${YELLOW}TESTING: No plan supplied. Plan will be generated with lama-first${WHITE}"
-    ../fast-downward.py --alias lama-first  output.sas
+    "$REPO_DIR"/fast-downward.py --alias lama-first output.sas
     mv sas_plan sas_plan_original
   else      
-    cp $3 sas_plan_original
+    cp "$PLAN_FILE" sas_plan_original
     
 fi
 echo -e "${YELLOW}TESTING: Plan generated in sas_plan-original{WHITE}"
 
 # 3 AE call
 echo -e "${YELLOW}TESTING: Calling Action Elimination${WHITE}"
-../src/translate/action_elim.py -t output.sas -p sas_plan_original --subsequence --enhanced --reduction MR
+"$REPO_DIR"/src/translate/action_elim.py -t output.sas -p sas_plan_original --subsequence --enhanced --reduction MR
 
 # 4 FD call solve action elimination task
 echo -e "${YELLOW}TESTING: Solving Action Elimination task${WHITE}"
-../fast-downward.py action-elimination.sas --search "astar(hmax())"
+"$REPO_DIR"/fast-downward.py action-elimination.sas --search "astar(hmax())"
 mv sas_plan sas_plan_skip
 
 # 5 EXP generation call
 echo -e "${YELLOW}TESTING: Calling Explanation Generator${WHITE}"
-../src/translate/explanation_redundant_actions.py -t output.sas -p sas_plan_original -s sas_plan_skip 
+"$REPO_DIR"/src/translate/explanation_redundant_actions.py -t output.sas -p sas_plan_original -s sas_plan_skip 
 
 #-------------------------------------------------------------------------------------------------------------------------------------
 
@@ -49,4 +56,5 @@ echo -e "${YELLOW}TESTING: Calling Explanation Generator${WHITE}"
 
 # Overall call: generate plan and action elimination
 #../fast-downward.py --translate --eliminate-action --search  --alias lama-first  $1 $2 -- --action-elimination-options --reduction MR --subsequence --enhanced --action-elimination-planner-config --search "astar(hmax())"
-# generates action-elimination.sas original-op-costs.txt output-sas sas_plan.1 and sas_plan.2
+# generates output.sas, sas_plan.1 and sas_plan.2. The files of action elimination (action-elimination.sas,
+# original-op-costs.txt) are stored in a temporary directory unless --action-elimination-workspace is given